@@ -0,0 +1,172 @@
+import uuid
+from datetime import datetime
+from recurrence import Repeat, normalize_repeat, days_to_mask, mask_to_days
+
+# Поля будильника в JSON в том порядке, в котором их записывала программа
+JSON_FIELDS = ("name", "active", "time", "timezone", "repeat", "days", "day_month", "date",
+               "melody", "notification", "id", "missed", "last_fired", "snoozed_until")
+
+
+def new_alarm_id():
+    return uuid.uuid4().hex[:12]
+
+
+class Alarm:
+    """Будильник с заранее разобранными полями.
+
+    Время хранится часами и минутами, дата — объектом date, дни недели — битовой маской
+    (бит 0 — понедельник), повтор — значением Repeat. Неизвестные поля JSON сохраняются в extra,
+    поэтому преобразование из словаря и обратно не теряет данных."""
+
+    __slots__ = ("id", "name", "active", "hour", "minute", "timezone", "_repeat", "_repeat_text", "weekdays",
+                 "day_month", "date", "melody", "notification", "missed", "last_fired", "snoozed_until", "extra")
+
+    def __init__(self, name="Будильник", active=True, hour=0, minute=0, timezone="", repeat=Repeat.ONCE,
+                 weekdays=0, day_month="1", date=None, melody="default", notification="", missed=None,
+                 last_fired=None, snoozed_until=None, alarm_id=None, extra=None):
+        self.id = alarm_id or new_alarm_id()
+        self.name = name
+        self.active = active
+        self.hour = hour
+        self.minute = minute
+        self.timezone = timezone
+        self._repeat = repeat
+        self._repeat_text = None  # исходная (возможно, локализованная) запись повтора из файла
+        self.weekdays = weekdays
+        self.day_month = day_month
+        self.date = date
+        self.melody = melody
+        self.notification = notification
+        self.missed = missed
+        self.last_fired = last_fired
+        self.snoozed_until = snoozed_until  # разовое отложенное срабатывание (секунды epoch)
+        self.extra = extra or {}
+
+    def __repr__(self):
+        return f"Alarm({self.id!r}, {self.name!r}, {self.time}, {self.repeat.value})"
+
+    @property
+    def repeat(self):
+        return self._repeat
+
+    @repeat.setter
+    def repeat(self, value):
+        self._repeat = normalize_repeat(value) if not isinstance(value, Repeat) else value
+        self._repeat_text = None
+
+    @property
+    def time(self):
+        return f"{self.hour:02d}:{self.minute:02d}"
+
+    @time.setter
+    def time(self, value):
+        self.hour, self.minute = parse_time(value)
+
+    @property
+    def days(self):
+        return mask_to_days(self.weekdays)
+
+    @days.setter
+    def days(self, values):
+        self.weekdays = days_to_mask(values)
+
+    @property
+    def date_text(self):
+        return self.date.strftime("%Y-%m-%d") if self.date else ""
+
+    @property
+    def day_of_month(self):
+        try:
+            return int(self.day_month)
+        except (TypeError, ValueError):
+            return 1
+
+    @classmethod
+    def from_dict(cls, data):
+        """Разбор и проверка словаря из JSON. Некорректные значения заменяются значениями по умолчанию."""
+        if not isinstance(data, dict):
+            raise ValueError(f"будильник должен быть объектом, а не {type(data).__name__}")
+        alarm = cls(alarm_id=str(data.get("id") or "") or None)
+        alarm.name = str(data.get("name", "Будильник"))
+        alarm.active = bool(data.get("active", True))
+        try:
+            alarm.hour, alarm.minute = parse_time(data.get("time", "00:00"))
+        except ValueError as e:
+            print("Некорректное время будильника", alarm.name, ":", e)
+        alarm.timezone = data.get("timezone", "") or ""
+        raw_repeat = data.get("repeat", "once")
+        alarm._repeat = normalize_repeat(raw_repeat)
+        alarm._repeat_text = raw_repeat if raw_repeat != alarm._repeat.value else None
+        alarm.weekdays = days_to_mask(data.get("days"))
+        alarm.day_month = data.get("day_month", "1")
+        if data.get("date"):
+            try:
+                alarm.date = datetime.strptime(data["date"], "%Y-%m-%d").date()
+            except (TypeError, ValueError) as e:
+                print("Некорректная дата будильника", alarm.name, ":", e)
+        alarm.melody = data.get("melody", "default")
+        alarm.notification = data.get("notification", "")
+        alarm.missed = data.get("missed")
+        alarm.last_fired = data.get("last_fired")
+        alarm.snoozed_until = data.get("snoozed_until")
+        alarm.extra = {key: value for key, value in data.items() if key not in JSON_FIELDS}
+        return alarm
+
+    def to_dict(self):
+        """Словарь в прежнем формате JSON (clock_config.json / alarms_config.json)."""
+        data = {
+            "name": self.name,
+            "active": self.active,
+            "time": self.time,
+            "timezone": self.timezone,
+            "repeat": self._repeat_text if self._repeat_text is not None else self._repeat.value,
+            "days": self.days,
+            "day_month": self.day_month,
+            "date": self.date_text,
+            "melody": self.melody,
+            "notification": self.notification,
+            "id": self.id,
+        }
+        if self.missed is not None:
+            data["missed"] = self.missed
+        if self.last_fired is not None:
+            data["last_fired"] = self.last_fired
+        if self.snoozed_until is not None:
+            data["snoozed_until"] = self.snoozed_until
+        data.update(self.extra)
+        return data
+
+    def copy(self, keep_id=False):
+        clone = Alarm.from_dict(self.to_dict())
+        if not keep_id:
+            clone.id = new_alarm_id()
+            clone.last_fired = None
+            clone.snoozed_until = None
+        return clone
+
+
+def parse_time(value):
+    """'HH:MM' -> (часы, минуты) с проверкой диапазона."""
+    hours, minutes = str(value).split(":")
+    hour, minute = int(hours), int(minutes)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"время вне диапазона: {value}")
+    return hour, minute
+
+
+def load_alarms(items):
+    """Список словарей из конфигурации -> список Alarm; каждый будильник проверяется один раз при загрузке."""
+    alarms = []
+    for item in items or []:
+        if isinstance(item, Alarm):
+            alarms.append(item)
+            continue
+        try:
+            alarms.append(Alarm.from_dict(item))
+        except ValueError as e:
+            print("Будильник пропущен:", e)
+    return alarms
+
+
+def dump_alarms(alarms):
+    return [alarm.to_dict() for alarm in alarms]
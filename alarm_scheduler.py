@@ -0,0 +1,288 @@
+import heapq
+import itertools
+import time
+from recurrence import next_occurrence
+from timezones import wall_time, to_timestamp
+from alarm_store import REMOVED, RESET
+
+# Окно срабатывания: будильник, опоздавший больше чем на минуту, не показывается (как в прежней проверке)
+FIRE_WINDOW = 60
+# Максимальная задержка таймера: раз в минуту расписание сверяется с системными часами
+MAX_SLEEP_MS = 60 * 1000
+# Расхождение (сек) между ожидаемым и фактическим пробуждением, после которого считаем,
+# что был сон системы, зависание цикла Tk или перевод часов
+GAP_THRESHOLD = 5
+# Насколько далеко в прошлое ищем пропущенные срабатывания при запуске или после сна
+CATCH_UP_LIMIT = 24 * 60 * 60
+
+# Что делать с пропущенным будильником (поле "missed" будильника)
+MISSED_FIRE = "fire"  # показать как обычное срабатывание
+MISSED_SUMMARY = "summary"  # собрать в одно общее уведомление
+MISSED_SKIP = "skip"  # только отметить как сработавший
+MISSED_POLICIES = (MISSED_FIRE, MISSED_SUMMARY, MISSED_SKIP)
+
+
+def alarm_fire_time(alarm, after):
+    """Ближайший момент срабатывания будильника (секунды epoch) строго после after
+    или None, если он выключен, некорректен или больше не повторяется.
+    Дата и время будильника — настенное время в его часовом поясе. Отложенный будильник
+    срабатывает ещё и в snoozed_until, его обычные повторения при этом не сдвигаются."""
+    tz_name = alarm.timezone
+    try:
+        when = next_occurrence(alarm, wall_time(after, tz_name))
+    except (TypeError, ValueError) as e:
+        print("Ошибка проверки будильника:", e)
+        return None
+    when = to_timestamp(when, tz_name) if when else None
+    snoozed = snooze_time(alarm)
+    if alarm.active and snoozed is not None and snoozed > after:
+        return snoozed if when is None else min(when, snoozed)
+    return when
+
+
+def snooze_time(alarm):
+    try:
+        return float(alarm.snoozed_until) if alarm.snoozed_until is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def missed_policy(alarm):
+    return alarm.missed if alarm.missed in MISSED_POLICIES else MISSED_SUMMARY
+
+
+class FiringLedger:
+    """Журнал срабатываний: для каждого будильника хранится момент последнего показанного
+    повторения (Alarm.last_fired, секунды epoch). Повторения будильника идут по возрастанию,
+    поэтому всё, что не позже этого момента, уже сработало и больше не показывается."""
+
+    @staticmethod
+    def last_fired(alarm):
+        try:
+            return float(alarm.last_fired or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def fired(self, alarm, when):
+        return when <= self.last_fired(alarm)
+
+    def record(self, alarm, when):
+        alarm.last_fired = int(when)
+        # отложенное срабатывание разовое: после него остаются только обычные повторения
+        snoozed = snooze_time(alarm)
+        if snoozed is not None and snoozed <= when:
+            alarm.snoozed_until = None
+
+
+class AlarmScheduler:
+    """Мин-куча заранее вычисленных моментов срабатывания будильников.
+
+    Время срабатывания пересчитывается только при изменении, срабатывании или откладывании
+    будильника, а вместо ежесекундного опроса взводится один root.after на ближайший из них."""
+
+    def __init__(self, root=None, on_fire=None, on_missed=None, on_skipped=None, fire_time=alarm_fire_time,
+                 clock=time.time, monotonic=time.monotonic):
+        self.root = root
+        self.on_fire = on_fire
+        # on_missed(список (будильник, момент)) — сводное уведомление о пропущенных будильниках
+        self.on_missed = on_missed
+        # on_skipped(список (будильник, момент)) — пропущенные без уведомления (политика skip)
+        self.on_skipped = on_skipped
+        self.fire_time = fire_time
+        self.clock = clock
+        self.monotonic = monotonic
+        self.ledger = FiringLedger()
+        self._heap = []  # (момент, порядковый номер, ключ)
+        self._entries = {}  # ключ -> (момент, порядковый номер) актуальной записи кучи
+        self._alarms = {}  # ключ -> будильник
+        self._counter = itertools.count()
+        self._timer = None
+        self._deadline = None  # момент, на который взведён таймер
+        self._last_wake = None  # (время, монотонное время) последнего пробуждения
+        self.store = None
+        # Всё, что не позже этого момента, уже обработано (сохраняется между запусками)
+        self.checked_until = None
+        self.gaps = 0
+        self.missed = 0
+
+    @staticmethod
+    def key(alarm):
+        return alarm.id
+
+    def attach(self, store, since=None):
+        # Подписка на хранилище будильников: расписание служит его индексом по времени срабатывания
+        self.store = store
+        store.next_fire_index = self
+        store.subscribe(self.on_store_event)
+        self.rebuild(store, since=since)
+
+    def on_store_event(self, event, alarm, index):
+        if event == RESET:
+            self.rebuild(self.store, since=self.checked_until)
+        elif event == REMOVED:
+            self.remove(alarm)
+        else:
+            self.schedule(alarm)
+
+    def rebuild(self, alarms, since=None):
+        # Полная перестройка расписания (загрузка или смена списка будильников).
+        # since — момент, до которого будильники уже были проверены (например, при прошлом запуске):
+        # срабатывания между ним и текущим моментом считаются пропущенными
+        self._heap = []
+        self._entries = {}
+        self._alarms = {}
+        now = self.clock()
+        after = now - FIRE_WINDOW
+        if since:
+            after = min(after, max(since, now - CATCH_UP_LIMIT))
+        for alarm in alarms:
+            entry = self._register(alarm, after)
+            if entry:
+                self._heap.append(entry)
+        heapq.heapify(self._heap)
+        self.arm()
+
+    def schedule(self, alarm):
+        # Пересчёт одного будильника после редактирования, срабатывания или откладывания
+        self.remove(alarm, rearm=False)
+        entry = self._register(alarm, self.clock() - FIRE_WINDOW)
+        if entry:
+            heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+        self.arm()
+
+    def _compact(self):
+        # Частые правки оставляют в куче устаревшие записи — периодически выбрасываем их
+        self._heap = [(when, seq, key) for key, (when, seq) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def remove(self, alarm, rearm=True):
+        # Старая запись в куче остаётся и будет пропущена при извлечении
+        key = self.key(alarm)
+        self._entries.pop(key, None)
+        self._alarms.pop(key, None)
+        if rearm:
+            self.arm()
+
+    def _register(self, alarm, after):
+        # Вычисление момента срабатывания после after; уже сработавшие повторения пропускаются.
+        # Запись в кучу добавляет вызывающий код
+        when = self.fire_time(alarm, max(after, self.ledger.last_fired(alarm)))
+        if when is None:
+            return None
+        key = self.key(alarm)
+        entry = (when, next(self._counter), key)
+        self._entries[key] = entry[:2]
+        self._alarms[key] = alarm
+        return entry
+
+    def _prune(self):
+        # Удаление с вершины кучи устаревших записей
+        heap = self._heap
+        while heap and self._entries.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)
+
+    def fire_time_of(self, alarm):
+        # Запланированный момент срабатывания будильника или None
+        entry = self._entries.get(self.key(alarm))
+        return entry[0] if entry else None
+
+    def next_fire_time(self):
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Извлекает наступившие будильники: список (будильник, момент срабатывания)."""
+        now = self.clock() if now is None else now
+        due = []
+        heap = self._heap
+        while True:
+            self._prune()
+            if not heap or heap[0][0] > now:
+                break
+            when, _, key = heapq.heappop(heap)
+            del self._entries[key]
+            due.append((self._alarms.pop(key), when))
+        return due
+
+    def arm(self):
+        # Один таймер Tk на ближайший будильник
+        if self.root is None:
+            return
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        when = self.next_fire_time()
+        now = self.clock()
+        if when is None:
+            delay = MAX_SLEEP_MS
+        else:
+            delay = min(MAX_SLEEP_MS, max(0, int((when - now) * 1000)))
+        self._deadline = now + delay / 1000
+        self._timer = self.root.after(delay, self._on_timer)
+
+    def detect_gap(self, now, mono):
+        """Проверяет, не было ли сна системы, зависания или перевода часов с прошлого пробуждения."""
+        gap = False
+        if self._deadline is not None and now - self._deadline > GAP_THRESHOLD:
+            gap = True  # таймер сработал намного позже, чем был взведён
+        if self._last_wake is not None:
+            wall_elapsed = now - self._last_wake[0]
+            mono_elapsed = mono - self._last_wake[1]
+            if abs(wall_elapsed - mono_elapsed) > GAP_THRESHOLD:
+                gap = True  # системные часы ушли относительно монотонных (сон или перевод часов)
+        self._last_wake = (now, mono)
+        if gap:
+            self.gaps += 1
+        return gap
+
+    def _on_timer(self):
+        self._timer = None
+        now = self.clock()
+        if self.detect_gap(now, self.monotonic()) and self.store is not None:
+            # Сон, зависание или перевод часов: моменты в куче посчитаны по прежним часам.
+            # Расписание перестраивается от последней проверки, и всё наступившее с неё
+            # process_due покажет, соберёт в сводку или пропустит по политике будильника
+            self.rebuild(self.store, since=self.checked_until)
+        self.process_due(now)
+        self.arm()
+
+    def process_due(self, now):
+        """Показывает наступившие будильники ровно один раз; опоздавшие дольше окна срабатывания
+        обрабатываются согласно их политике пропуска."""
+        missed = []
+        skipped = []
+        for alarm, when in self.pop_due(now):
+            if not self.ledger.fired(alarm, when):
+                self.ledger.record(alarm, when)
+                if now - when < FIRE_WINDOW:
+                    if self.on_fire:
+                        self.on_fire(alarm)
+                else:
+                    self.missed += 1
+                    policy = missed_policy(alarm)
+                    if policy == MISSED_FIRE and self.on_fire:
+                        self.on_fire(alarm)
+                    elif policy == MISSED_SUMMARY:
+                        missed.append((alarm, when))
+                    elif policy == MISSED_SKIP:
+                        skipped.append((alarm, when))
+            # Следующее повторение; пропущенные подряд повторения объединяются в одно
+            entry = self._register(alarm, max(when, now - FIRE_WINDOW))
+            if entry:
+                heapq.heappush(self._heap, entry)
+        self.checked_until = now
+        if missed and self.on_missed:
+            self.on_missed(missed)
+        if skipped and self.on_skipped:
+            self.on_skipped(skipped)
+        return missed
+
+    def cancel(self):
+        if self.root is not None and self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = None
+
+    def __len__(self):
+        return len(self._entries)
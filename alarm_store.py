@@ -0,0 +1,440 @@
+import time
+from alarm_model import load_alarms
+
+# События изменения набора будильников
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+RESET = "reset"
+
+# Поля будильника, которые меняет расписание (срабатывание выключает разовый будильник,
+# отмечает last_fired и снимает отложенное срабатывание), а не форма в окне
+SCHEDULER_FIELDS = ("active", "last_fired", "snoozed_until")
+
+
+def unique_name(base, has_name, suffixes):
+    # suffixes: базовое имя -> номер, с которого продолжать поиск
+    if not has_name(base):
+        return base
+    index = suffixes.get(base, 1)
+    while has_name(f"{base} {index}"):
+        index += 1
+    suffixes[base] = index + 1
+    return f"{base} {index}"
+
+
+def scheduler_state(alarm):
+    return tuple(getattr(alarm, field) for field in SCHEDULER_FIELDS)
+
+
+class AlarmStore:
+    """Единственный владелец будильников программы.
+
+    Хранит порядок отображения, индексы по идентификатору и по имени и рассылает подписчикам
+    (расписанию, списку в окне, сохранению) события added/removed/changed/reset.
+    Индекс по времени срабатывания ведёт подписанный AlarmScheduler."""
+
+    def __init__(self, alarms=()):
+        self._order = []  # идентификаторы в порядке отображения
+        self._by_id = {}
+        self._by_name = {}  # имя -> множество идентификаторов
+        self._name_suffix = {}  # базовое имя -> следующий номер для unique_name
+        self._listeners = []
+        self.next_fire_index = None  # подписанное расписание (AlarmScheduler)
+        self._reset(alarms)
+
+    # --- подписка ---
+
+    def subscribe(self, listener):
+        """listener(event, alarm, index): index — позиция будильника в списке; для reset alarm и index равны None."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, alarm=None, index=None):
+        for listener in list(self._listeners):
+            try:
+                listener(event, alarm, index)
+            except Exception as e:
+                print("Ошибка обработчика будильников:", e)
+
+    # --- чтение ---
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        by_id = self._by_id
+        return (by_id[alarm_id] for alarm_id in self._order)
+
+    def __getitem__(self, index):
+        return self._by_id[self._order[index]]
+
+    def __bool__(self):
+        return bool(self._order)
+
+    def get(self, alarm_id):
+        return self._by_id.get(alarm_id)
+
+    def index_of(self, alarm):
+        return self._order.index(alarm.id)
+
+    def find_by_name(self, name):
+        return [self._by_id[alarm_id] for alarm_id in self._by_name.get(name, ())]
+
+    def has_name(self, name):
+        return bool(self._by_name.get(name))
+
+    def unique_name(self, base):
+        """Свободное имя вида «base», «base 1», «base 2»... за амортизированное O(1)."""
+        return unique_name(base, self.has_name, self._name_suffix)
+
+    def next_fire(self, alarm):
+        """Момент ближайшего срабатывания (секунды epoch) по индексу расписания или None."""
+        if self.next_fire_index is None:
+            return None
+        return self.next_fire_index.fire_time_of(alarm)
+
+    def to_dict(self):
+        return [alarm.to_dict() for alarm in self]
+
+    def __reduce__(self):
+        # В снимок конфигурации (pickle) попадают только будильники, без подписчиков
+        return list, (list(self),)
+
+    # --- изменение ---
+
+    def append(self, alarm):
+        return self.insert(len(self._order), alarm)
+
+    def insert(self, index, alarm):
+        if alarm.id in self._by_id:
+            alarm = alarm.copy()  # идентификатор уже занят — добавляем как новый будильник
+        self._order.insert(index, alarm.id)
+        self._by_id[alarm.id] = alarm
+        self._index_name(alarm)
+        self._notify(ADDED, alarm, index)
+        return alarm
+
+    def pop(self, index=-1):
+        if index < 0:
+            index += len(self._order)
+        alarm_id = self._order.pop(index)
+        alarm = self._by_id.pop(alarm_id)
+        self._unindex_name(alarm.id)
+        self._notify(REMOVED, alarm, index)
+        return alarm
+
+    def remove(self, alarm):
+        return self.pop(self.index_of(alarm))
+
+    def remove_many(self, alarms):
+        """Удаляет несколько будильников, пересобирая порядок один раз. События removed идут
+        от последней позиции к первой, поэтому индекс каждого верен для подписчиков."""
+        ids = {alarm.id for alarm in alarms if alarm.id in self._by_id}
+        if not ids:
+            return []
+        removed = [(index, self._by_id[alarm_id]) for index, alarm_id in enumerate(self._order) if alarm_id in ids]
+        self._order = [alarm_id for alarm_id in self._order if alarm_id not in ids]
+        for index, alarm in removed:
+            del self._by_id[alarm.id]
+            self._unindex_name(alarm.id)
+        for index, alarm in reversed(removed):
+            self._notify(REMOVED, alarm, index)
+        return [alarm for index, alarm in removed]
+
+    def clear(self):
+        self._reset(())
+        self._notify(RESET)
+
+    def replace_all(self, alarms):
+        self._reset(alarms)
+        self._notify(RESET)
+
+    def changed(self, alarm):
+        """Сообщить, что поля будильника изменены (имя переиндексируется).
+        Если передана другая копия будильника с тем же id, она заменяет хранимую."""
+        if alarm.id not in self._by_id:
+            return
+        self._by_id[alarm.id] = alarm
+        self._unindex_name(alarm.id)
+        self._index_name(alarm)
+        self._notify(CHANGED, alarm, self._order.index(alarm.id))
+
+    def changed_many(self, alarms):
+        for alarm in alarms:
+            self.changed(alarm)
+
+    def _reset(self, alarms):
+        self._order = []
+        self._by_id = {}
+        self._by_name = {}
+        self._name_suffix = {}
+        self._names = {}
+        for alarm in load_alarms(alarms):
+            if alarm.id in self._by_id:
+                alarm = alarm.copy()
+            self._order.append(alarm.id)
+            self._by_id[alarm.id] = alarm
+            self._index_name(alarm)
+
+    def _index_name(self, alarm):
+        self._names[alarm.id] = alarm.name
+        self._by_name.setdefault(alarm.name, set()).add(alarm.id)
+
+    def _unindex_name(self, alarm_id):
+        name = self._names.pop(alarm_id, None)
+        ids = self._by_name.get(name)
+        if ids is not None:
+            ids.discard(alarm_id)
+            if not ids:
+                del self._by_name[name]
+
+
+class AlarmEditSession:
+    """Сеанс правки будильников в окне поверх AlarmStore с копированием при записи.
+
+    Пока будильник не изменён, читается объект из хранилища; edit() даёт его копию, которая
+    живёт в сеансе. Сеанс помнит добавленные, изменённые и удалённые будильники, и commit()
+    переносит в хранилище только их. Собственный порядок строк появляется при первом
+    добавлении или удалении. Повторяет API хранилища, которым пользуется окно."""
+
+    def __init__(self, store):
+        self.store = store
+        self._order = None  # идентификаторы строк, если порядок разошёлся с хранилищем
+        self._edits = {}  # id -> копия (изменённые и добавленные будильники)
+        self._added = {}  # id добавленных в порядке добавления
+        self._base = {}  # id -> значения SCHEDULER_FIELDS хранимого будильника в момент edit()
+        self._removed = set()
+        # Имена копий сеанса: имя -> идентификаторы и id -> имя при индексации, как в хранилище
+        self._by_name = {}
+        self._names = {}
+        # найденные хранилищем номера unique_name остаются в силе и для сеанса
+        self._name_suffix = dict(store._name_suffix)
+        self._listeners = []
+        self._committing = False
+        store.subscribe(self._on_store_event)
+
+    def detach(self):
+        self.store.unsubscribe(self._on_store_event)
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, alarm=None, index=None):
+        for listener in list(self._listeners):
+            try:
+                listener(event, alarm, index)
+            except Exception as e:
+                print("Ошибка обработчика будильников:", e)
+
+    @property
+    def dirty(self):
+        return bool(self._edits or self._removed)
+
+    # --- чтение ---
+
+    def _ids(self):
+        return self._order if self._order is not None else self.store._order
+
+    def _get(self, alarm_id):
+        return self._edits.get(alarm_id) or self.store.get(alarm_id)
+
+    def __len__(self):
+        return len(self._ids())
+
+    def __iter__(self):
+        return (self._get(alarm_id) for alarm_id in self._ids())
+
+    def __getitem__(self, index):
+        return self._get(self._ids()[index])
+
+    def __bool__(self):
+        return bool(self._ids())
+
+    def index_of(self, alarm):
+        return self._ids().index(alarm.id)
+
+    def has_name(self, name):
+        if self._by_name.get(name):
+            return True
+        # имя в хранилище занято, только если будильник не переименован и не удалён в сеансе
+        return any(alarm_id not in self._edits and alarm_id not in self._removed
+                   for alarm_id in self.store._by_name.get(name, ()))
+
+    def unique_name(self, base):
+        return unique_name(base, self.has_name, self._name_suffix)
+
+    def next_fire(self, alarm):
+        index = self.store.next_fire_index
+        if alarm.id in self._edits:
+            # правка ещё не в расписании — считаем по самой копии
+            return index.fire_time(alarm, time.time()) if index is not None else None
+        return self.store.next_fire(alarm)
+
+    # --- изменение ---
+
+    def edit(self, target):
+        """Копия будильника (по индексу строки или объекту) для изменения в сеансе или None."""
+        alarm = self[target] if isinstance(target, int) else target
+        if alarm.id in self._edits:
+            return self._edits[alarm.id]
+        original = self.store.get(alarm.id)
+        if original is None:
+            return None
+        copy = original.copy(keep_id=True)
+        self._edits[alarm.id] = copy
+        self._base[alarm.id] = scheduler_state(original)
+        self._index_name(copy)
+        return copy
+
+    def changed(self, alarm):
+        if alarm.id in self._edits:
+            if self._names.get(alarm.id) != alarm.name:
+                self._unindex_name(alarm.id)
+                self._index_name(alarm)
+            self._notify(CHANGED, alarm, self.index_of(alarm))
+
+    def changed_many(self, alarms):
+        for alarm in alarms:
+            self.changed(alarm)
+
+    def _own_order(self):
+        if self._order is None:
+            self._order = list(self.store._order)
+        return self._order
+
+    def append(self, alarm):
+        order = self._own_order()
+        if alarm.id in self._edits or self.store.get(alarm.id) is not None:
+            alarm = alarm.copy()
+        order.append(alarm.id)
+        self._edits[alarm.id] = alarm
+        self._added[alarm.id] = None
+        self._index_name(alarm)
+        self._notify(ADDED, alarm, len(order) - 1)
+        return alarm
+
+    def pop(self, index=-1):
+        order = self._own_order()
+        if index < 0:
+            index += len(order)
+        alarm_id = order.pop(index)
+        alarm = self._get(alarm_id)
+        self._drop_edit(alarm_id)
+        if alarm_id in self._added:
+            del self._added[alarm_id]
+        else:
+            self._removed.add(alarm_id)
+        self._notify(REMOVED, alarm, index)
+        return alarm
+
+    def remove(self, alarm):
+        return self.pop(self.index_of(alarm))
+
+    def clear(self):
+        for alarm_id in self._ids():
+            if alarm_id not in self._added:
+                self._removed.add(alarm_id)
+        self._order = []
+        self._forget_edits()
+        self._notify(RESET)
+
+    def commit(self):
+        """Переносит в хранилище только изменения сеанса и возвращает их (добавленные, изменённые, удалённые)."""
+        store = self.store
+        added = [self._edits[alarm_id] for alarm_id in self._added]
+        changed = [alarm for alarm_id, alarm in self._edits.items() if alarm_id not in self._added]
+        removed = [store.get(alarm_id) for alarm_id in self._removed if store.get(alarm_id) is not None]
+        for alarm in changed:
+            original = store.get(alarm.id)
+            if original is not None:
+                self._merge_scheduler_state(alarm, original)
+        self._committing = True
+        try:
+            if len(removed) + len(added) >= len(store) and (removed or added):
+                # Очистка, импорт в пустой список и т. п.: разница не меньше самого списка, поэтому
+                # хранилище заменяется целиком — одно событие reset и один сброс журнала
+                store.replace_all(list(self))
+            else:
+                store.remove_many(removed)
+                for alarm in changed:
+                    if store.get(alarm.id) is not None:
+                        store.changed(alarm)
+                for alarm in added:
+                    store.append(alarm)
+        finally:
+            self._committing = False
+        self._order = None
+        self._forget_edits()
+        self._removed = set()
+        return added, changed, removed
+
+    def _on_store_event(self, event, alarm, index):
+        # Изменения хранилища не из сеанса (срабатывание, пропуск) показываем в окне
+        if self._committing:
+            return
+        if event == RESET:
+            self._order = None
+            self._forget_edits()
+            self._removed = set()
+            self._notify(RESET)
+            return
+        if event == ADDED:
+            if self._order is not None:
+                self._order.append(alarm.id)
+                index = len(self._order) - 1
+            self._notify(ADDED, alarm, index)
+        elif event == REMOVED:
+            self._drop_edit(alarm.id)
+            if alarm.id in self._removed:
+                self._removed.discard(alarm.id)
+                return
+            if self._order is not None:
+                index = self._order.index(alarm.id)
+                self._order.pop(index)
+            self._notify(REMOVED, alarm, index)
+        elif event == CHANGED and alarm.id not in self._edits and alarm.id not in self._removed:
+            if self._order is not None:
+                index = self._order.index(alarm.id)
+            self._notify(CHANGED, alarm, index)
+
+    def _merge_scheduler_state(self, alarm, original):
+        # Пока шла правка, будильник мог сработать. Поля расписания, которые в сеансе не меняли,
+        # берутся из хранилища, иначе копия вернула бы сработавший разовый будильник и снятый snooze
+        base = self._base.get(alarm.id)
+        for field, start in zip(SCHEDULER_FIELDS, base or scheduler_state(original)):
+            if base is None or getattr(alarm, field) == start:
+                setattr(alarm, field, getattr(original, field))
+        # журнал срабатываний ведёт только расписание
+        alarm.last_fired = original.last_fired
+
+    def _drop_edit(self, alarm_id):
+        self._base.pop(alarm_id, None)
+        if self._edits.pop(alarm_id, None) is not None:
+            self._unindex_name(alarm_id)
+
+    def _forget_edits(self):
+        self._edits = {}
+        self._added = {}
+        self._base = {}
+        self._by_name = {}
+        self._names = {}
+
+    def _index_name(self, alarm):
+        self._names[alarm.id] = alarm.name
+        self._by_name.setdefault(alarm.name, set()).add(alarm.id)
+
+    def _unindex_name(self, alarm_id):
+        name = self._names.pop(alarm_id, None)
+        ids = self._by_name.get(name)
+        if ids is not None:
+            ids.discard(alarm_id)
+            if not ids:
+                del self._by_name[name]
@@ -1,12 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pytz
 import json
-import copy
 import os
+import time
 from datetime import datetime, timedelta
-from tkcalendar import Calendar
-from config import load_config, save_config, LANGUAGES, DEFAULT_LANGUAGE
+from config import load_config, LANGUAGES, DEFAULT_LANGUAGE
 
 import platform
 try:
@@ -15,12 +13,18 @@ except ImportError:
     winsound = None
 
 from utils import ToolTip, play_sound
+from recurrence import make_rule, alarm_rule, days_to_mask, mask_to_days, ONCE, DAILY, WEEKLY
+from alarm_model import Alarm, load_alarms, dump_alarms, parse_time
+from alarm_store import AlarmStore, AlarmEditSession, ADDED, REMOVED, CHANGED
+from alarm_scheduler import MISSED_POLICIES, missed_policy
+from timezones import now_in, wall_time
+from virtual_list import VirtualList, Column
 
 
 # Путь к файлу конфигурации для отладки
 CONFIG_FILE = "alarms_config.json"
 # дефолтная геометрия формы
-DEFAULT_GEOMETRY = (420, 320, 100, 100)  # width, height, x, y
+DEFAULT_GEOMETRY = (640, 320, 100, 100)  # width, height, x, y
 
 # Проверка, что форма не вылазит за пределы окна
 def fit_into_screen(x, y, width, height, screen_w, screen_h, margin=10):
@@ -35,8 +39,13 @@ def fit_into_screen(x, y, width, height, screen_w, screen_h, margin=10):
         y = screen_h - height - margin
     return x, y
 
+def row_color(alarm):
+    # Цвет строки списка: выключенные будильники серые
+    return 'black' if alarm.active else 'gray'
+
+
 class AlarmsSettingsWindow:
-    def __init__(self, root=None, bell_label=None, cfg=None, l10n=None, update_callback=None):
+    def __init__(self, root=None, bell_label=None, cfg=None, l10n=None, update_callback=None, store=None):
         # корневое окно программы
         self.root = root or tk.Tk()
         # кнопка будильника рядом с котрой открывается окно
@@ -45,12 +54,20 @@ class AlarmsSettingsWindow:
         self.cfg = cfg or {}
         # словарь локализации
         self.l10n = l10n or LANGUAGES.get(self.cfg.get("language", DEFAULT_LANGUAGE), LANGUAGES["ru"])
-        # локальная копия списка будильников. Каждый будильник - словарь с настройками
-        self.alarms = copy.deepcopy(self.cfg.get("alarms", []))
+        # общее хранилище будильников программы (при самостоятельном запуске — своё)
+        self.store = store if store is not None else AlarmStore(self.cfg.get("alarms", []))
+        # окно правит будильники в сеансе поверх хранилища; в хранилище попадают только изменения
+        self.alarms = AlarmEditSession(self.store)
         # индекс выбранного будильника
         self.selected_index = tk.IntVar(value=0 if self.alarms else -1)
         # функция, которая вернет результат при закрытии окна
         self.update_callback = update_callback
+        # форма заполняется из выбранного будильника (см. on_listbox_select)
+        self.loading_form = False
+        # всплывающий календарь (см. choose_date) создаётся при первом открытии
+        self.popup_cal = None
+        self.calendar = None
+        self.calendar_click_id = None
 
         self.win = tk.Toplevel(self.root) if root else self.root
         self.win.title(self.l10n.get("alarms_title", "Будильники"))
@@ -62,6 +79,8 @@ class AlarmsSettingsWindow:
         # создание виджетов
         self.create_widgets()
         self.load_selected()
+        # список перерисовывается при любом изменении будильников, в т.ч. при срабатывании
+        self.alarms.subscribe(self.on_store_event)
 
     def position_window(self):
         """Позиционирование формы будильников"""
@@ -105,9 +124,13 @@ class AlarmsSettingsWindow:
 
     def on_close(self):
         # готовим пакет данных для передачи
+        # изменения будильников переносим в общее хранилище, наружу отдаём только геометрию окна
+        self.commit_changes()
+        self.alarms.unsubscribe(self.on_store_event)
+        self.alarms.detach()
+        self.destroy_calendar()
         result = {
-            "alarms": copy.deepcopy(self.alarms),  # список будильников
-            "alarms_window": self.win.geometry()  # геометрия окна
+            "alarms_window": self.win.geometry()
         }
 
         # если есть callback – отдадим наружу
@@ -156,7 +179,13 @@ class AlarmsSettingsWindow:
         menu_btn.config(menu=menu)
         ToolTip(menu_btn, "Файл (Экспорт/Импорт)")
 
-        self.alarm_list = tk.Listbox(left_frame, width=25, height=10, exportselection=False, bg='white')
+        # Виртуальный список: строки и колонки состояния вычисляются только для видимой части
+        self.alarm_list = VirtualList(left_frame, self.alarms, [
+            Column(self.l10n.get("alarm", "Будильник"), 140, self.name_cell),
+            Column(self.l10n.get("next_fire", "Следующий"), 90, self.next_fire_cell),
+            Column(self.l10n.get("periodicity", "Повтор:").rstrip(":"), 85, self.repeat_cell),
+            Column(self.l10n.get("timezone", "Часовой пояс:").rstrip(":"), 90, self.zone_cell),
+        ], height=10)
         self.alarm_list.pack(fill="both", expand=True, pady=(5, 0))
         self.alarm_list.bind("<<ListboxSelect>>", self.on_listbox_select)
         self.alarm_list.bind("<Button-3>", self.show_context_menu)  # Контекстное меню правой кнопкой
@@ -338,6 +367,17 @@ class AlarmsSettingsWindow:
         ToolTip(self.choose_melody_btn, "Выберите MP3 файл")
         self.choose_melody_btn.pack(fill="x", padx=5, pady=(0, 5))
 
+        # что делать, если будильник пропущен (сон, выключенный компьютер)
+        self.missed_label = tk.Label(right_frame, text=self.l10n.get("missed_policy", "Если пропущен:"), bg='white',
+                                     font=("Arial", 10, "bold"))
+        self.missed_label.pack(anchor="w", padx=5, pady=(5, 2))
+        self.missed_names = {policy: self.l10n.get("missed_" + policy, policy) for policy in MISSED_POLICIES}
+        self.missed_var = tk.StringVar(value=self.missed_names[missed_policy(Alarm())])
+        self.missed_combo = ttk.Combobox(right_frame, textvariable=self.missed_var,
+                                         values=list(self.missed_names.values()), state="readonly")
+        self.missed_combo.pack(fill="x", padx=5, pady=(0, 5))
+        self.missed_combo.bind("<<ComboboxSelected>>", self.update_alarm_from_form)
+
         self.notification_label = tk.Label(right_frame, text=self.l10n.get("notification", "Уведомление:"), bg='white',
                                            font=("Arial", 10, "bold"))
         self.notification_label.pack(anchor="w", padx=5, pady=(5, 2))
@@ -351,18 +391,31 @@ class AlarmsSettingsWindow:
         self.notification_frame.pack(fill="x", padx=5, pady=(0, 5))
 
     def update_repeat_text(self):
-        """Обновляет текст описания повторений"""
-        selected_days = [day for day, var in zip(
-            ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"], self.days_vars
-        ) if var.get()]
+        """Обновляет текст описания повторений и ближайшего срабатывания"""
+        idx = self.selected_index.get()
+        alarm = self.alarms[idx] if 0 <= idx < len(self.alarms) else Alarm()
+        try:
+            hour, minute = parse_time(f"{self.hour_spin.get()}:{self.min_spin.get()}")
+            rule = make_rule(alarm.repeat, hour, minute, self.selected_date,
+                             days_to_mask([var.get() for var in self.days_vars]), alarm.day_of_month)
+        except ValueError:
+            rule = None
 
-        if len(selected_days) == 0:
+        if rule is None or rule.kind == ONCE:
             date_str = self.selected_date.strftime("%Y-%m-%d")
-            self.repeat_text.set(f"Один раз — {date_str}")
-        elif len(selected_days) == 7:
-            self.repeat_text.set("Ежедневно")
+            text = f"Один раз — {date_str}"
+        elif rule.kind == DAILY:
+            text = self.l10n.get("daily", "Ежедневно")
+        elif rule.kind == WEEKLY:
+            mask = rule.weekdays or 1 << self.selected_date.weekday()
+            text = "Каждый: " + ", ".join(
+                day for day, on in zip(["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"], mask_to_days(mask)) if on)
         else:
-            self.repeat_text.set("Каждый: " + ", ".join(selected_days))
+            text = f"{self.l10n.get('monthly', 'Ежемесячно')}: {rule.day_of_month}"
+        next_time = rule.next_after(now_in(self.timezone_combo.get()).replace(tzinfo=None)) if rule else None
+        if next_time:
+            text += f" → {next_time.strftime('%Y-%m-%d %H:%M')}"
+        self.repeat_text.set(text)
 
         # --- Плавная подсветка текста при изменении ---
         def flash_label(step=0):
@@ -379,22 +432,34 @@ class AlarmsSettingsWindow:
     def choose_date(self):
         """Показ встроенного календаря (как на скриншоте)"""
         # Если календарь уже открыт — просто закрываем
-        if hasattr(self, "popup_cal") and self.popup_cal.winfo_exists():
-            self.popup_cal.destroy()
+        if self.popup_cal is not None and self.popup_cal.winfo_viewable():
+            self.hide_calendar()
             return
 
-        # Создаём всплывающее окно
-        self.popup_cal = tk.Toplevel(self.win)
-        self.popup_cal.overrideredirect(True)
-        self.popup_cal.configure(bg="white")
+        # Всплывающее окно с календарём строится один раз, дальше только показывается
+        if self.popup_cal is None:
+            self.build_calendar()
+        self.calendar.selection_set(self.selected_date)
+        self.calendar.see(self.selected_date)
 
         # Позиция под кнопкой 📅
         bx = self.date_btn.winfo_rootx()
         by = self.date_btn.winfo_rooty() + self.date_btn.winfo_height()
         self.popup_cal.geometry(f"+{bx}+{by}")
+        self.popup_cal.deiconify()
+        self.popup_cal.lift()
+
+    def build_calendar(self):
+        # tkcalendar загружается только при первом открытии
+        from tkcalendar import Calendar
+
+        self.popup_cal = tk.Toplevel(self.win)
+        self.popup_cal.withdraw()
+        self.popup_cal.overrideredirect(True)
+        self.popup_cal.configure(bg="white")
 
         # Сам календарь
-        cal = Calendar(
+        self.calendar = Calendar(
             self.popup_cal,
             selectmode="day",
             year=self.selected_date.year,
@@ -407,34 +472,67 @@ class AlarmsSettingsWindow:
             selectforeground="white",
             weekendbackground="white"
         )
-        cal.pack(padx=5, pady=5)
+        self.calendar.pack(padx=5, pady=5)
+        self.calendar.bind("<<CalendarSelected>>", self.on_date_selected)
+        # Клик вне календаря закрывает его; обработчик один на всё время жизни окна
+        self.calendar_click_id = self.win.bind("<Button-1>", self.close_calendar_on_click_outside, add="+")
 
+    def on_date_selected(self, event=None):
         # При выборе даты сохраняем и закрываем
-        def save_date(event=None):
-            for var in self.days_vars:
-                var.set(False)
-            self.selected_date = cal.selection_get()
-            self.update_repeat_text()
-            self.update_alarm_from_form()
-            self.popup_cal.destroy()
-
-        cal.bind("<<CalendarSelected>>", save_date)
+        for var in self.days_vars:
+            var.set(False)
+        self.selected_date = self.calendar.selection_get()
+        self.update_repeat_text()
+        self.update_alarm_from_form()
+        self.hide_calendar()
 
-        # Закрываем при клике вне календаря
-        def close_on_click_outside(event):
-            if not getattr(self, "popup_cal", None):
+    def close_calendar_on_click_outside(self, event):
+        if self.popup_cal is None or event.widget is self.date_btn:
+            # повторный клик по 📅 закрывает календарь сам (choose_date)
+            return
+        try:
+            if not self.popup_cal.winfo_viewable():
                 return
-            try:
-                if not (
-                        self.popup_cal.winfo_rootx() <= event.x_root <= self.popup_cal.winfo_rootx() + self.popup_cal.winfo_width()
-                        and self.popup_cal.winfo_rooty() <= event.y_root <= self.popup_cal.winfo_rooty() + self.popup_cal.winfo_height()
-                ):
-                    if self.popup_cal.winfo_exists():
-                        self.popup_cal.destroy()
-            except tk.TclError:
-                pass
-
-        self.win.bind("<Button-1>", close_on_click_outside, add="+")
+            x, y = self.popup_cal.winfo_rootx(), self.popup_cal.winfo_rooty()
+            if not (x <= event.x_root <= x + self.popup_cal.winfo_width()
+                    and y <= event.y_root <= y + self.popup_cal.winfo_height()):
+                self.hide_calendar()
+        except tk.TclError:
+            pass
+
+    def hide_calendar(self):
+        if self.popup_cal is not None and self.popup_cal.winfo_exists():
+            self.popup_cal.withdraw()
+
+    def destroy_calendar(self):
+        # Снимаем только свою привязку: unbind с funcid в tkinter удалил бы все обработчики <Button-1> окна
+        if self.popup_cal is None:
+            return
+        script = self.win.bind("<Button-1>")
+        kept = "\n".join(line for line in script.splitlines() if self.calendar_click_id not in line)
+        self.win.bind("<Button-1>", kept)
+        self.win.deletecommand(self.calendar_click_id)
+        self.popup_cal.destroy()
+        self.popup_cal = self.calendar = self.calendar_click_id = None
+
+    def commit_changes(self):
+        # Добавленные, изменённые и удалённые в окне будильники -> хранилище
+        if self.alarms.dirty:
+            self.alarms.commit()
+
+    def on_store_event(self, event, alarm, index):
+        # Изменение в хранилище будильников (из формы, расписания или уведомления):
+        # правим только затронутую строку списка
+        if not self.win.winfo_exists():
+            return
+        if event == ADDED:
+            self.insert_row(index, alarm)
+        elif event == REMOVED:
+            self.delete_row(index)
+        elif event == CHANGED:
+            self.patch_row(index, alarm)
+        else:
+            self.update_alarm_list()
 
     def update_active_color(self, *args):
         # Обновление цвета переключателя активности
@@ -443,22 +541,60 @@ class AlarmsSettingsWindow:
         else:
             self.active_switch.configure(style='Switch.Off.TCheckbutton')
 
+    def name_cell(self, alarm):
+        return alarm.name, row_color(alarm)
+
+    def next_fire_cell(self, alarm):
+        when = self.alarms.next_fire(alarm)
+        if when is None:
+            return "—", "gray"
+        return wall_time(when, alarm.timezone).strftime("%d.%m %H:%M"), row_color(alarm)
+
+    def repeat_cell(self, alarm):
+        kind = alarm_rule(alarm).kind
+        return self.l10n.get(kind.value, kind.value), row_color(alarm)
+
+    def zone_cell(self, alarm):
+        return alarm.timezone.rsplit("/", 1)[-1].replace("_", " "), "gray"
+
     def update_alarm_list(self):
-        self.alarm_list.delete(0, tk.END)
-        for i, alarm in enumerate(self.alarms):
-            self.alarm_list.insert(i, alarm["name"])
-            self.alarm_list.itemconfig(i, {'fg': 'black' if alarm.get("active", True) else 'gray'})
+        # Полная перерисовка — только при замене всего списка
+        self.alarm_list.reset()
 
         if self.alarms:
             if self.selected_index.get() < 0 or self.selected_index.get() >= len(self.alarms):
                 self.selected_index.set(0)
 
             idx = self.selected_index.get()
-            self.alarm_list.selection_clear(0, tk.END)
             self.alarm_list.selection_set(idx)
             self.alarm_list.activate(idx)
-            self.alarm_list.see(idx)  # всегда видимая строка
-            self.alarm_list.focus_set()
+            self.alarm_list.see(idx)
+        else:
+            self.selected_index.set(-1)
+
+    def insert_row(self, index, alarm):
+        self.alarm_list.rows_inserted(index)
+        if 0 <= index <= self.selected_index.get():
+            self.selected_index.set(self.selected_index.get() + 1)
+
+    def delete_row(self, index):
+        self.alarm_list.rows_removed(index)
+        selected = self.selected_index.get()
+        if index < selected or selected >= len(self.alarms):
+            self.selected_index.set(selected - 1 if self.alarms else -1)
+
+    def patch_row(self, index, alarm):
+        # Перерисовка одной строки, если она видна; выделение и прокрутка не меняются
+        self.alarm_list.refresh_row(index)
+
+    def select_row(self, index):
+        # Выделение одной строки (новый или импортированный будильник) и загрузка её в форму
+        self.alarm_list.selection_clear(0, tk.END)
+        self.alarm_list.selection_set(index)
+        self.alarm_list.activate(index)
+        self.alarm_list.see(index)
+        self.selected_index.set(index)
+        self.on_listbox_select(None)
 
     def on_listbox_select(self, event=None):
         if not self.alarm_list.curselection():
@@ -466,53 +602,51 @@ class AlarmsSettingsWindow:
         idx = self.alarm_list.curselection()[0]
         self.selected_index.set(idx)
         alarm = self.alarms[idx]
+        # пока поля заполняются, их обработчики не должны записывать форму в будильник
+        self.loading_form = True
+        try:
+            self.fill_form(alarm)
+        finally:
+            self.loading_form = False
 
+    def fill_form(self, alarm):
+        # Поля формы из будильника
         self.name_entry.delete(0, tk.END)
-        self.name_entry.insert(0, alarm.get("name", "Будильник"))
-        self.active_var.set(alarm.get("active", True))
+        self.name_entry.insert(0, alarm.name)
+        self.active_var.set(alarm.active)
 
-        time_parts = alarm.get("time", "00:00").split(":")
         self.hour_spin.delete(0, tk.END)
-        self.hour_spin.insert(0, time_parts[0])
+        self.hour_spin.insert(0, f"{alarm.hour:02d}")
         self.min_spin.delete(0, tk.END)
-        self.min_spin.insert(0, time_parts[1])
+        self.min_spin.insert(0, f"{alarm.minute:02d}")
 
-        self.timezone_combo.set(alarm.get("timezone", "Europe/Moscow"))
+        self.timezone_combo.set(alarm.timezone or "Europe/Moscow")
 
-        for i, var in enumerate(self.days_vars):
-            var.set(alarm.get("days", [False] * 7)[i])
+        for var, on in zip(self.days_vars, alarm.days):
+            var.set(on)
 
-        self.date_entry.set_date(
-            datetime.strptime(alarm.get("date", datetime.now().strftime("%Y-%m-%d")), "%Y-%m-%d").date())
+        self.selected_date = alarm.date or datetime.now().date()
         self.update_repeat_text()
-        self.yearly_date_entry.set_date(
-            datetime.strptime(alarm.get("date", datetime.now().strftime("%Y-%m-%d")), "%Y-%m-%d").date())
 
-        self.melody_var.set(alarm.get("melody", "default"))
+        self.melody_var.set(alarm.melody)
+        self.missed_var.set(self.missed_names[missed_policy(alarm)])
         self.notification_entry.delete(0, tk.END)
-        self.notification_entry.insert(0, alarm.get("notification", ""))
+        self.notification_entry.insert(0, alarm.notification)
 
         self.update_active_color()
 
     def add_alarm(self):
         # Добавление нового будильника с временем +1 час
-        base_name = "Будильник"
-        existing_names = [a["name"] for a in self.alarms]
-        index = 1
-        new_name = base_name
-        while new_name in existing_names:
-            new_name = f"{base_name} {index}"
-            index += 1
+        new_name = self.alarms.unique_name("Будильник")
         # Установка времени текущим + 1 час
         tz_name = self.timezone_combo.get() or self.cfg["clocks"][0]["timezone"] if self.cfg.get("clocks") else "Europe/Moscow"
-        tz = pytz.timezone(tz_name)
-        now = datetime.now(tz)
+        now = now_in(tz_name)
         future_time = now + timedelta(hours=1)
         alarm_time = future_time.strftime("%H:%M")
         default_date = now.strftime("%Y-%m-%d")
         if now.strftime("%H:%M") > alarm_time:
             default_date = (now + timedelta(days=1)).strftime("%Y-%m-%d")
-        new_alarm = {
+        new_alarm = Alarm.from_dict({
             "name": new_name,
             "active": True,
             "time": alarm_time,
@@ -523,18 +657,14 @@ class AlarmsSettingsWindow:
             "date": default_date,
             "melody": "default",
             "notification": ""
-        }
+        })
         self.alarms.append(new_alarm)
-        self.update_alarm_list()
-        self.alarm_list.select_set(len(self.alarms) - 1)
-        self.selected_index.set(len(self.alarms) - 1)
-        self.on_listbox_select(None)
+        self.select_row(len(self.alarms) - 1)
 
     def remove_alarm(self):
         # Удаление выбранного будильника
         if self.selected_index.get() >= 0 and messagebox.askyesno(self.l10n.get("alarms_title", "Будильники"), self.l10n.get("confirm_remove", "Удалить будильник?")):
             self.alarms.pop(self.selected_index.get())
-            self.update_alarm_list()
             if self.alarms:
                 new_index = min(self.selected_index.get(), len(self.alarms) - 1)
                 self.alarm_list.select_set(new_index)
@@ -547,7 +677,6 @@ class AlarmsSettingsWindow:
         # Очистка всех будильников
         if messagebox.askyesno(self.l10n.get("alarms_title", "Будильники"), self.l10n.get("confirm_clear", "Очистить все будильники?")):
             self.alarms.clear()
-            self.update_alarm_list()
             self.selected_index.set(-1)
             self.load_selected()
 
@@ -556,7 +685,7 @@ class AlarmsSettingsWindow:
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
             with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(self.alarms, f, ensure_ascii=False, indent=2)
+                json.dump(dump_alarms(self.alarms), f, ensure_ascii=False, indent=2)
 
     def import_alarms(self):
         # Импорт будильников из файла
@@ -564,14 +693,12 @@ class AlarmsSettingsWindow:
         if file_path:
             try:
                 with open(file_path, "r", encoding="utf-8") as f:
-                    imported_alarms = json.load(f)
+                    imported_alarms = load_alarms(json.load(f))
+                    # хранилище само выдаёт новый идентификатор при повторном импорте того же файла
                     for alarm in imported_alarms:
                         self.alarms.append(alarm)
-                    self.update_alarm_list()
                     if self.alarms:
-                        self.alarm_list.select_set(len(self.alarms) - 1)
-                        self.selected_index.set(len(self.alarms) - 1)
-                        self.on_listbox_select(None)
+                        self.select_row(len(self.alarms) - 1)
             except Exception as e:
                 messagebox.showerror("Error", f"Invalid file format: {e}")
 
@@ -589,14 +716,13 @@ class AlarmsSettingsWindow:
             total_mins = hours * 60 + mins
             if total_mins > 0:
                 tz_name = self.timezone_combo.get() or self.cfg["clocks"][0]["timezone"] if self.cfg.get("clocks") else "Europe/Moscow"
-                tz = pytz.timezone(tz_name)
-                now = datetime.now(tz)
+                now = now_in(tz_name)
                 current_time = f"{now.hour:02d}:{now.minute:02d}"
                 future_time = now + timedelta(minutes=total_mins)
                 default_date = now.strftime("%Y-%m-%d")
                 if current_time > f"{future_time.hour:02d}:{future_time.minute:02d}":
                     default_date = (now + timedelta(days=1)).strftime("%Y-%m-%d")
-                new_alarm = {
+                new_alarm = Alarm.from_dict({
                     "name": "Таймер",
                     "active": True,
                     "time": future_time.strftime("%H:%M"),
@@ -607,12 +733,9 @@ class AlarmsSettingsWindow:
                     "date": default_date,
                     "melody": "default",
                     "notification": "Таймер сработал"
-                }
+                })
                 self.alarms.append(new_alarm)
-                self.update_alarm_list()
-                self.alarm_list.select_set(len(self.alarms) - 1)
-                self.selected_index.set(len(self.alarms) - 1)
-                self.on_listbox_select(None)
+                self.select_row(len(self.alarms) - 1)
                 dialog.destroy()
 
         tk.Button(dialog, text="Старт", command=start_timer).pack(pady=10)
@@ -695,33 +818,27 @@ class AlarmsSettingsWindow:
 
     def set_active(self):
         # Установка активности для выделенных будильников
-        for idx in self.alarm_list.curselection():
-            self.alarms[idx]["active"] = True
-        self.update_alarm_list()
+        selected = [self.alarms.edit(idx) for idx in self.alarm_list.curselection()]
+        for alarm in selected:
+            alarm.active = True
+        self.alarms.changed_many(selected)
 
     def unset_active(self):
         # Снятие активности для выделенных будильников
-        for idx in self.alarm_list.curselection():
-            self.alarms[idx]["active"] = False
-        self.update_alarm_list()
+        selected = [self.alarms.edit(idx) for idx in self.alarm_list.curselection()]
+        for alarm in selected:
+            alarm.active = False
+        self.alarms.changed_many(selected)
 
     def copy_alarms(self):
         # Копирование выделенных будильников
         selected_indices = self.alarm_list.curselection()
-        copied_alarms = [copy.deepcopy(self.alarms[i]) for i in selected_indices]
+        copied_alarms = [self.alarms[i].copy() for i in selected_indices]
         for alarm in copied_alarms:
-            base_name = alarm["name"] + " (копия)"
-            existing_names = [a["name"] for a in self.alarms]
-            if base_name in existing_names:
-                index = 1
-                new_name = f"{base_name} {index}"
-                while new_name in existing_names:
-                    index += 1
-                    new_name = f"{base_name} {index}"
-                alarm["name"] = new_name
+            alarm.name = self.alarms.unique_name(alarm.name + " (копия)")
             self.alarms.append(alarm)
-        self.update_alarm_list()
         if self.alarms:
+            self.alarm_list.selection_clear(0, tk.END)
             self.alarm_list.select_set(len(self.alarms) - len(copied_alarms), len(self.alarms) - 1)
             self.selected_index.set(len(self.alarms) - len(copied_alarms))
 
@@ -739,23 +856,31 @@ class AlarmsSettingsWindow:
         self.win.geometry(f"+{x}+{y}")
 
     def update_alarm_from_form(self, event=None):
+        if self.loading_form:
+            return
         if 0 <= self.selected_index.get() < len(self.alarms):
-            alarm = self.alarms[self.selected_index.get()]
-            alarm["name"] = self.name_entry.get()
-            alarm["active"] = self.active_var.get()
-            alarm["time"] = f"{self.hour_spin.get()}:{self.min_spin.get()}"
-            alarm["timezone"] = self.timezone_combo.get()
-            alarm["date"] = str(self.selected_date)
-            alarm["melody"] = self.melody_var.get()
-            alarm["notification"] = self.notification_entry.get()
-            alarm["days"] = [var.get() for var in self.days_vars]  # <-- добавь это!
-            self.update_alarm_list()
+            alarm = self.alarms.edit(self.selected_index.get())
+            alarm.name = self.name_entry.get()
+            alarm.active = self.active_var.get()
+            try:
+                alarm.time = f"{self.hour_spin.get()}:{self.min_spin.get()}"
+            except ValueError:
+                pass  # время ещё вводится — оставляем прежнее
+            alarm.timezone = self.timezone_combo.get()
+            alarm.date = self.selected_date
+            alarm.melody = self.melody_var.get()
+            policy = next(key for key, name in self.missed_names.items() if name == self.missed_var.get())
+            if policy != missed_policy(alarm):
+                alarm.missed = policy
+            alarm.notification = self.notification_entry.get()
+            alarm.days = [var.get() for var in self.days_vars]
+            self.alarms.changed(alarm)
 
     def set_form_state(self, enabled=True):
         state = "normal" if enabled else "disabled"
         widgets = [
             self.name_entry, self.hour_spin, self.min_spin,
-            self.timezone_combo, self.melody_combo,
+            self.timezone_combo, self.melody_combo, self.missed_combo,
             self.choose_melody_btn, self.notification_entry,
             self.edit_note_btn]
 
@@ -767,9 +892,9 @@ class AlarmsSettingsWindow:
 
     def get_alarm_text(self, alarm):
         """Возвращает текст уведомления"""
-        if alarm.get("notification"):
-            return alarm["notification"]
-        return f"{alarm.get('name', 'Будильник')} в {alarm.get('time', '00:00')}"
+        if alarm.notification:
+            return alarm.notification
+        return f"{alarm.name} в {alarm.time}"
 
     def show_notification(self, alarm):
         """Показывает уведомление в правом нижнем углу с отступом ~1–1.5 см и запускает звук."""
@@ -813,31 +938,24 @@ class AlarmsSettingsWindow:
                                                                          padx=(5, 0))
 
         # Запускаем звук
-        play_sound(alarm.get("melody"), self.root)
+        play_sound(alarm.melody, self.root)
 
     def snooze_alarm(self, alarm, minutes, win):
-        """Сдвигает время будильника на указанное число минут, останавливает звук и закрывает уведомление."""
-        try:
-            # если в alarm["date"] нет даты — ставим сегодня
-            if not alarm.get("date"):
-                alarm["date"] = datetime.now().strftime("%Y-%m-%d")
-
-            # сдвигаем
-            dt = datetime.now() + timedelta(minutes=minutes)
-            alarm["time"] = dt.strftime("%H:%M")
-            alarm["date"] = dt.strftime("%Y-%m-%d")
-        except Exception as e:
-            print("Ошибка snooze:", e)
+        """Откладывает будильник на указанное число минут (разовое срабатывание, время и повтор
+        будильника не меняются), останавливает звук и закрывает уведомление."""
+        edited = self.alarms.edit(alarm)
+        if edited is not None:
+            edited.snoozed_until = int(time.time() + minutes * 60)
+            edited.active = True  # одноразовый будильник при срабатывании выключился
+            self.alarms.changed(edited)
 
         # стоп звука и закрытие окна
         self.stop_alarm_sound()
         if win and win.winfo_exists():
             win.destroy()
 
-        self.update_alarm_list()
-        # при желании можно сразу сохранить:
-        self.cfg["alarms"] = self.alarms
-        save_config(self.cfg)
+        # отложенный будильник сразу уходит в хранилище (а с ним расписание и сохранение)
+        self.commit_changes()
 
     def stop_alarm(self, notif_win):
         """Обработчик кнопки Стоп: остановить звук и закрыть окно уведомления."""
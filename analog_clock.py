@@ -0,0 +1,122 @@
+import math
+
+# Вид часов (поле "style" часов в конфигурации)
+STYLE_DIGITAL = "digital"
+STYLE_ANALOG = "analog"
+# Диаметр циферблата в размерах шрифта времени
+FACE_SCALE = 3
+MIN_FACE_SIZE = 40
+
+# Единичные векторы стрелок (от 12 часов по часовой стрелке, ось y вниз), считаются один раз:
+# 60 положений минутной и секундной стрелок и 720 (12 часов × 60 минут) — часовой
+UNIT_60 = tuple((math.sin(2 * math.pi * i / 60), -math.cos(2 * math.pi * i / 60)) for i in range(60))
+UNIT_720 = tuple((math.sin(2 * math.pi * i / 720), -math.cos(2 * math.pi * i / 720)) for i in range(720))
+
+# Длина и толщина стрелок в долях радиуса и диаметра
+HANDS = (
+    # (имя, таблица, длина, толщина)
+    ("hour", UNIT_720, 0.5, 0.045),
+    ("minute", UNIT_60, 0.75, 0.03),
+    ("second", UNIT_60, 0.85, 0.012),
+)
+
+
+def is_analog(clock_cfg):
+    return clock_cfg.get("style", STYLE_DIGITAL) == STYLE_ANALOG
+
+
+def face_size(clock_cfg):
+    try:
+        font_size = int(clock_cfg.get("font_size", 36))
+    except (TypeError, ValueError):
+        font_size = 36
+    return max(MIN_FACE_SIZE, font_size * FACE_SCALE)
+
+
+class AnalogFace:
+    """Стрелочный циферблат на Canvas.
+
+    Циферблат, деления и цифры рисуются один раз при создании; на каждом тике меняются только
+    координаты линий стрелок, которые берутся из заранее посчитанных для этого размера таблиц,
+    причём coords вызывается лишь для сдвинувшихся стрелок. Все элементы помечены общим тегом,
+    поэтому циферблат переносится одним canvas.move."""
+
+    def __init__(self, canvas, size, color, seconds=True, x=0, y=0):
+        self.canvas = canvas
+        self.size = size
+        self.color = color
+        self.seconds = seconds
+        self.origin = (x, y)
+        self.tag = "face%d" % id(self)
+        self._hands = {}  # имя стрелки -> элемент
+        self._tables = {}  # имя стрелки -> координаты линии для каждого положения
+        self._shown = {}  # имя стрелки -> текущее положение
+        self.draw()
+
+    @property
+    def key(self):
+        # Циферблат перерисовывается, только если изменился этот ключ
+        return (self.size, self.color, self.seconds)
+
+    def draw(self):
+        canvas = self.canvas
+        size = self.size
+        x, y = self.origin
+        radius = size / 2
+        cx, cy = x + radius, y + radius
+        tag = self.tag
+        canvas.create_oval(x + 1, y + 1, x + size - 1, y + size - 1, outline=self.color, width=max(1, size // 60),
+                           tags=tag)
+        for i, (ux, uy) in enumerate(UNIT_60):
+            # часовые деления длиннее и толще минутных
+            inner = radius * (0.82 if i % 5 == 0 else 0.9)
+            outer = radius * 0.96
+            canvas.create_line(cx + ux * inner, cy + uy * inner, cx + ux * outer, cy + uy * outer, fill=self.color,
+                               width=max(1, size // (40 if i % 5 == 0 else 120)), tags=tag)
+        if size >= 80:
+            numeral_font = ("Arial", max(6, size // 14))
+            for hour in range(1, 13):
+                ux, uy = UNIT_60[hour * 5 % 60]
+                canvas.create_text(cx + ux * radius * 0.68, cy + uy * radius * 0.68, text=str(hour),
+                                   fill=self.color, font=numeral_font, tags=tag)
+        for name, unit, length, thickness in HANDS:
+            if name == "second" and not self.seconds:
+                continue
+            self._tables[name] = self.hand_table(unit, length)
+            self._hands[name] = canvas.create_line(cx, cy, cx, cy, fill=self.color, width=max(1, round(size * thickness)),
+                                                   capstyle="round", tags=tag)
+        self._shown = {}
+
+    def hand_table(self, unit, length):
+        # Координаты линии стрелки для всех положений при текущем размере и положении циферблата
+        x, y = self.origin
+        radius = self.size / 2
+        cx, cy = x + radius, y + radius
+        reach = radius * length
+        return tuple((cx, cy, cx + ux * reach, cy + uy * reach) for ux, uy in unit)
+
+    def move_to(self, x, y):
+        dx, dy = x - self.origin[0], y - self.origin[1]
+        if not dx and not dy:
+            return
+        self.canvas.move(self.tag, dx, dy)
+        self.origin = (x, y)
+        for name, unit, length, thickness in HANDS:
+            if name in self._tables:
+                self._tables[name] = self.hand_table(unit, length)
+
+    def show(self, now):
+        """Стрелки на время now; возвращает число сдвинутых стрелок."""
+        positions = {"hour": now.hour % 12 * 60 + now.minute, "minute": now.minute, "second": now.second}
+        moved = 0
+        for name, item in self._hands.items():
+            index = positions[name]
+            if self._shown.get(name) != index:
+                self.canvas.coords(item, *self._tables[name][index])
+                self._shown[name] = index
+                moved += 1
+        return moved
+
+    def destroy(self):
+        self.canvas.delete(self.tag)
+        self._hands.clear()
@@ -0,0 +1,73 @@
+"""Бенчмарк проверки будильников: ежесекундный перебор со strptime против кучи AlarmScheduler.
+
+Запуск: python benchmarks/bench_alarm_scheduler.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alarm_scheduler import AlarmScheduler  # noqa: E402
+from alarm_model import load_alarms  # noqa: E402
+
+
+def make_alarms(count, now):
+    rnd = random.Random(count)
+    alarms = []
+    for i in range(count):
+        when = now + timedelta(minutes=rnd.randint(1, 60 * 24 * 30))
+        alarms.append({
+            "name": f"Будильник {i}",
+            "active": True,
+            "time": when.strftime("%H:%M"),
+            "repeat": "once",
+            "date": when.strftime("%Y-%m-%d"),
+        })
+    return alarms
+
+
+def legacy_check(alarms, now):
+    # Прежний DigitalClockApp.check_alarms без показа уведомлений
+    fired = 0
+    for alarm in alarms:
+        if not alarm.get("active", True):
+            continue
+        alarm_time = datetime.strptime(f"{alarm['date']} {alarm['time']}", "%Y-%m-%d %H:%M")
+        if 0 <= (now - alarm_time).total_seconds() < 60:
+            fired += 1
+    return fired
+
+
+def measure(func, min_time=0.2):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def main():
+    now = datetime.now()
+    now_ts = now.timestamp()
+    print(f"{'alarms':>7} {'legacy check, ms':>17} {'heap build, ms':>15} {'heap check, us':>15} {'reschedule, us':>15}")
+    for count in (10, 1000, 100000):
+        alarms = make_alarms(count, now)
+        legacy = measure(lambda: legacy_check(alarms, now), min_time=0.5 if count > 1000 else 0.2)
+
+        models = load_alarms(alarms)
+        scheduler = AlarmScheduler()
+        build = measure(lambda: scheduler.rebuild(models))
+        check = measure(lambda: scheduler.pop_due(now_ts))
+        edited = models[count // 2]
+        reschedule = measure(lambda: scheduler.schedule(edited))
+        print(f"{count:>7} {legacy * 1e3:>17.3f} {build * 1e3:>15.3f} {check * 1e6:>15.2f} {reschedule * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Бенчмарк отрисовки часов: рамка и метки на каждые часы (ClockWidget) против одного Canvas
+(CanvasClockView). Для 1, 20 и 100 часов печатает число окон Tk, вызовов Tk за тик и время тика
+вместе с перерисовкой. Нужен дисплей (на Linux без X можно запустить через xvfb-run).
+
+Запуск: python benchmarks/bench_clock_render.py
+"""
+import os
+import sys
+import time
+import tkinter as tk
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock_widgets import ClockWidget  # noqa: E402
+from canvas_clock import CanvasClockView  # noqa: E402
+from time_format import compile_format  # noqa: E402
+
+LANGUAGE = "ru"
+TICKS = 50
+
+
+class CountingTk:
+    """Обёртка интерпретатора Tk, считающая вызовы call (все команды виджетов идут через него)."""
+
+    def __init__(self, tkapp):
+        self._tk = tkapp
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self._tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+
+def make_clocks(count):
+    return [{
+        "id": f"clock{i}",
+        "title": f"Часы {i}",
+        "font_size": 36,
+        "title_font_size": 12,
+        "date_font_size": 12,
+        "color": "#FFFFFF",
+        "timezone": "Europe/Moscow",
+        "time_format": "HH:mm:ss",
+        "date_format": "dd-MM-yyyy w" if i % 2 else "",
+    } for i in range(count)]
+
+
+def count_windows(widget):
+    return 1 + sum(count_windows(child) for child in widget.winfo_children())
+
+
+def measure(view_class, count):
+    root = tk.Tk()
+    counter = CountingTk(root.tk)
+    root.tk = counter  # виджеты берут интерпретатор у родителя при создании
+    container = tk.Frame(root, bg='black')
+    container.pack(expand=True, fill="both")
+    app = SimpleNamespace(root=root, container=container, language=LANGUAGE,
+                          cfg={"clocks": make_clocks(count)}, adjust_window_size=lambda: None)
+    view = view_class(app)
+    view.load_clocks_from_cfg()
+    root.update()
+    windows = count_windows(container) - 1
+
+    time_format = compile_format("HH:mm:ss", LANGUAGE)
+    now = datetime(2025, 10, 16, 21, 7, 5)
+    calls_before = counter.calls
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        now += timedelta(seconds=1)
+        text = time_format.render(now)
+        for widget in view.clock_widgets:
+            font = view.fonts.get((widget["id"], "time"), "Arial", 36)
+            view.renderer.apply(widget["time_label"], text=text, font=font, fg="#FFFFFF")
+        root.update_idletasks()
+    elapsed = (time.perf_counter() - start) / TICKS
+    calls = (counter.calls - calls_before) / TICKS
+    root.destroy()
+    return windows, calls, elapsed
+
+
+def main():
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print("Нужен дисплей:", e)
+        return
+    print(f"{'clocks':>7} {'renderer':>9} {'windows':>8} {'Tk calls/tick':>14} {'ms/tick':>8}")
+    for count in (1, 20, 100):
+        for name, view_class in (("labels", ClockWidget), ("canvas", CanvasClockView)):
+            windows, calls, elapsed = measure(view_class, count)
+            print(f"{count:>7} {name:>9} {windows:>8} {calls:>14.1f} {elapsed * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
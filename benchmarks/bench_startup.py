@@ -0,0 +1,75 @@
+"""Бенчмарк запуска: загрузка конфигурации и будильников холодным путём (разбор JSON, значения
+по умолчанию, проверка будильников) и тёплым (двоичный снимок рядом с clock_config.json).
+
+Запуск: python benchmarks/bench_startup.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_config(count):
+    rnd = random.Random(count)
+    alarms = []
+    for i in range(count):
+        alarms.append({
+            "name": f"Будильник {i}",
+            "active": True,
+            "time": f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}",
+            "timezone": "Europe/Moscow",
+            "repeat": rnd.choice(["once", "daily", "weekly", "monthly"]),
+            "days": [rnd.random() < 0.3 for _ in range(7)],
+            "day_month": "1",
+            "date": "2030-01-01",
+            "melody": "default",
+            "notification": "",
+            "id": f"{i:012x}",
+        })
+    return {"window": {"x": 100, "y": 100, "width": 300, "height": 200}, "language": "ru", "alarms": alarms}
+
+
+def measure(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="clock-startup-")
+    os.chdir(workdir)  # config.py работает с файлами в текущем каталоге
+    import config
+    from alarm_store import AlarmStore
+
+    def startup():
+        # то же, что делает DigitalClockApp до создания виджетов
+        cfg = config.load_config()
+        journal = config.config_store.alarm_log()
+        alarms, _ = journal.replay(cfg.get("alarms", []), since=cfg.get("alarms_journal_seq"))
+        return AlarmStore(alarms)
+
+    def cold():
+        config.config_store.cache.invalidate()
+        startup()
+
+    print(f"{'alarms':>7} {'cold, ms':>10} {'warm, ms':>10} {'speedup':>8}")
+    for count in (10, 1000, 10000):
+        with open(config.CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(make_config(count), f, ensure_ascii=False, indent=2)
+        cold_time = measure(cold)
+        startup()  # создаёт снимок
+        warm_time = measure(startup)
+        print(f"{count:>7} {cold_time * 1e3:>10.2f} {warm_time * 1e3:>10.2f} {cold_time / warm_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
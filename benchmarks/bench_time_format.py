@@ -0,0 +1,78 @@
+"""Микро-бенчмарк форматирования времени: старая цепочка replace против скомпилированного формата.
+
+Запуск: python benchmarks/bench_time_format.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LANGUAGES  # noqa: E402
+from time_format import format_datetime  # noqa: E402
+
+LANGUAGE = "ru"
+FORMATS = [("HH:mm:ss", "dd-MM-yyyy w"), ("hh:mm p", "W, dd-MM-yy")]
+
+
+def legacy_convert_format(user_format, now, language=LANGUAGE):
+    # Копия DigitalClockApp.convert_format до перехода на time_format
+    if not user_format:
+        return ""
+    hour_24 = now.strftime("%H")
+    hour_12 = now.strftime("%I")
+    minute = now.strftime("%M")
+    second = now.strftime("%S")
+    day = now.strftime("%d")
+    month = now.strftime("%m")
+    year_full = now.strftime("%Y")
+    year_short = now.strftime("%y")
+    am_pm = "AM" if int(hour_24) < 12 else "PM"
+    days_short = LANGUAGES[language].get("days_short", ["Sat", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri"])
+    days_full = LANGUAGES[language].get("days_full",
+                                        ["Saturday", "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday",
+                                         "Friday"])
+    adjusted_weekday = (now.weekday() + 1) % 7
+    day_short = days_short[adjusted_weekday]
+    day_full = days_full[adjusted_weekday]
+    result = user_format
+    result = result.replace("HH", hour_24).replace("H", hour_24)
+    result = result.replace("hh", hour_12).replace("h", hour_12)
+    result = result.replace("mm", minute).replace("m", minute)
+    result = result.replace("ss", second).replace("s", second)
+    if "p" in result:
+        result = result.replace("p", am_pm)
+        if "hh" in user_format or "h" in user_format:
+            result = result.replace("HH", hour_12).replace("H", hour_12)
+    result = result.replace("dd", day)
+    result = result.replace("MM", month)
+    result = result.replace("yyyy", year_full)
+    result = result.replace("yy", year_short)
+    result = result.replace("w", day_short)
+    result = result.replace("W", day_full)
+    return result
+
+
+def tick(convert, clocks, now):
+    # Один тик главного цикла: время и дата для каждых часов
+    for i in range(clocks):
+        time_format, date_format = FORMATS[i % len(FORMATS)]
+        convert(time_format, now, LANGUAGE)
+        convert(date_format, now, LANGUAGE)
+
+
+def main():
+    now = datetime(2025, 10, 16, 21, 7, 5)
+    print(f"{'clocks':>7} {'legacy, us/tick':>16} {'compiled, us/tick':>18} {'speedup':>8}")
+    for clocks in (1, 10, 100):
+        number = max(200, 20000 // clocks)
+        legacy = min(timeit.repeat(lambda: tick(legacy_convert_format, clocks, now), number=number, repeat=5))
+        compiled = min(timeit.repeat(lambda: tick(format_datetime, clocks, now), number=number, repeat=5))
+        legacy_us = legacy / number * 1e6
+        compiled_us = compiled / number * 1e6
+        print(f"{clocks:>7} {legacy_us:>16.1f} {compiled_us:>18.1f} {legacy_us / compiled_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
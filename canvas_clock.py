@@ -0,0 +1,162 @@
+import tkinter as tk
+from config import DEFAULT_FONT
+from clock_widgets import ClockWidget, LabelRenderer, face_key, has_fraction, FRAME_PADX, FRAME_PADY, DATE_PADY
+from time_format import compile_format, split_fraction
+from analog_clock import AnalogFace
+
+
+class CanvasRenderer(LabelRenderer):
+    """LabelRenderer для текстовых элементов Canvas: цвет метки (fg) — это fill элемента."""
+
+    def __init__(self, canvas):
+        super().__init__()
+        self.canvas = canvas
+
+    def configure(self, item, options):
+        if "fg" in options:
+            options = dict(options)
+            options["fill"] = options.pop("fg")
+        self.canvas.itemconfigure(item, **options)
+
+
+class CanvasClockView(ClockWidget):
+    """Все часы — текстовые элементы одного Canvas вместо рамки и трёх меток на каждые часы.
+
+    Интерфейс тот же, что у ClockWidget: в clock_widgets вместо меток лежат id элементов, а renderer
+    меняет их через itemconfigure только при изменении текста, шрифта или цвета. Раскладка считается
+    по кэшированным метрикам шрифтов, менеджер геометрии Tk в ней не участвует. Фон чёрный, как у
+    окна, поэтому остаётся прозрачным; перетаскивание обрабатывает окно."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.canvas = tk.Canvas(app.container, bg='black', highlightthickness=0, bd=0, width=0, height=0)
+        self.canvas.pack(expand=True, fill="both")
+        self.renderer = CanvasRenderer(self.canvas)
+        self._coords = {}  # элемент -> (x, y)
+        self._canvas_size = None
+
+    def load_clocks_from_cfg(self):
+        # Сверка с уже нарисованными часами по id, как в ClockWidget
+        family = self.app.cfg.get("global_font", DEFAULT_FONT)
+        existing = {widget["id"]: widget for widget in self.clock_widgets}
+        widgets = []
+        for clock_cfg in self.app.cfg["clocks"]:
+            widget = existing.pop(clock_cfg.get("id"), None)
+            if widget is None:
+                widget = self.create_clock(clock_cfg, family)
+            else:
+                self.update_clock(widget, clock_cfg, family)
+            widgets.append(widget)
+        for widget in existing.values():
+            self.destroy_clock(widget)
+        self.clock_widgets = widgets
+        self.layout(family)
+
+        self.app.adjust_window_size()
+
+    def create_clock(self, clock_cfg, family):
+        color = clock_cfg.get("color", "#FFFFFF")
+        title_font = self.fonts.get((clock_cfg.get("id"), "title"), family, clock_cfg.get("title_font_size", 12),
+                                    "bold")
+        title = clock_cfg.get("title", "Часы")
+        title_item = self.canvas.create_text(0, 0, anchor="nw", text=title, fill=color, font=title_font)
+        self.renderer.remember(title_item, text=title, fg=color, font=title_font)
+
+        widget = {
+            "id": clock_cfg.get("id"),
+            "title_label": title_item
+        }
+        self.add_time_display(widget, clock_cfg, family)
+        if clock_cfg.get("date_format", ""):
+            self.add_date_label(widget, clock_cfg, family)
+        return widget
+
+    def add_time_display(self, widget, clock_cfg, family):
+        # Стрелочный циферблат рисуется на том же Canvas; место ему назначает layout
+        key = face_key(clock_cfg, self.app.language)
+        if key:
+            size, color, seconds = key
+            widget["face"] = AnalogFace(self.canvas, size, color, seconds)
+            return
+        color = clock_cfg.get("color", "#FFFFFF")
+        time_font = self.fonts.get((clock_cfg.get("id"), "time"), family, clock_cfg.get("font_size", 36))
+        # С долями секунды основная часть прижата вправо к отдельному элементу долей,
+        # поэтому доли стоят на месте, сколько бы ни занимали цифры перед ними
+        anchor = "ne" if has_fraction(clock_cfg) else "nw"
+        time_item = self.canvas.create_text(0, 0, anchor=anchor, text="", fill=color, font=time_font)
+        self.renderer.remember(time_item, text="", fg=color, font=time_font)
+        widget["time_label"] = time_item
+        if anchor == "ne":
+            fraction_item = self.canvas.create_text(0, 0, anchor="nw", text="", fill=color, font=time_font)
+            self.renderer.remember(fraction_item, text="", fg=color, font=time_font)
+            widget["fraction_label"] = fraction_item
+
+    def remove_time_display(self, widget):
+        face = widget.pop("face", None)
+        if face:
+            face.destroy()
+        for name in ("time_label", "fraction_label"):
+            if name in widget:
+                self.delete_item(widget.pop(name))
+
+    def add_date_label(self, widget, clock_cfg, family):
+        color = clock_cfg.get("color", "#FFFFFF")
+        date_font = self.fonts.get((clock_cfg.get("id"), "date"), family, clock_cfg.get("date_font_size", 12))
+        date_item = self.canvas.create_text(0, 0, anchor="nw", text="", fill=color, font=date_font)
+        self.renderer.remember(date_item, text="", fg=color, font=date_font)
+        widget["date_label"] = date_item
+
+    def remove_date_label(self, widget):
+        self.delete_item(widget.pop("date_label"))
+
+    def destroy_clock(self, widget):
+        for name in ("title_label", "date_label", "time_label", "fraction_label"):
+            if name in widget:
+                self.delete_item(widget[name])
+        if "face" in widget:
+            widget["face"].destroy()
+        self.fonts.release(widget["id"])
+
+    def delete_item(self, item):
+        self.renderer.forget(item)
+        self._coords.pop(item, None)
+        self.canvas.delete(item)
+
+    def layout(self, family):
+        # Те же отступы, что у рамок и меток ClockWidget; coords — только для сдвинувшихся элементов
+        fonts = self.fonts
+        y = 0
+        for clock_cfg, widget in zip(self.app.cfg["clocks"], self.clock_widgets):
+            y += FRAME_PADY[0]
+            self.place(widget["title_label"], y)
+            y += fonts.linespace(family, clock_cfg.get("title_font_size", 12), "bold")
+            if "date_label" in widget:
+                y += DATE_PADY[0]
+                self.place(widget["date_label"], y)
+                y += fonts.linespace(family, clock_cfg.get("date_font_size", 12)) + DATE_PADY[1]
+            if "face" in widget:
+                widget["face"].move_to(FRAME_PADX, y)
+                y += widget["face"].size + FRAME_PADY[1]
+                continue
+            if "fraction_label" in widget:
+                head = compile_format(split_fraction(clock_cfg.get("time_format", "HH:mm:ss"))[0], self.app.language)
+                x = FRAME_PADX + fonts.format_width(head, family, clock_cfg.get("font_size", 36))
+                self.place(widget["time_label"], y, x)
+                self.place(widget["fraction_label"], y, x)
+            else:
+                self.place(widget["time_label"], y)
+            y += fonts.linespace(family, clock_cfg.get("font_size", 36)) + FRAME_PADY[1]
+        size = self.required_size()
+        if size != self._canvas_size:
+            self.canvas.configure(width=size[0], height=size[1])
+            self._canvas_size = size
+
+    def place(self, item, y, x=FRAME_PADX):
+        position = (x, y)
+        if self._coords.get(item) != position:
+            self.canvas.coords(item, *position)
+            self._coords[item] = position
+
+    def label_chrome(self):
+        # У текстовых элементов нет рамки и внутренних отступов
+        return (0, 0)
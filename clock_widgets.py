@@ -1,41 +1,265 @@
 import tkinter as tk
-from datetime import datetime
-import pytz
+from config import DEFAULT_FONT
+from fonts import FontRegistry
+from time_format import compile_format, split_fraction, CADENCE_SECOND
+from analog_clock import AnalogFace, is_analog, face_size
+
+# Отступы рамки часов в контейнере (см. load_clocks_from_cfg)
+FRAME_PADX = 5
+FRAME_PADY = (10, 15)
+DATE_PADY = (2, 2)
+
+# cfg["renderer"]: как рисуются часы
+RENDERER_LABELS = "labels"  # рамка и метки Tk на каждые часы (по умолчанию)
+RENDERER_CANVAS = "canvas"  # текстовые элементы одного Canvas (canvas_clock.py)
+
+
+def face_key(clock_cfg, language):
+    """Ключ стрелочного циферблата (размер, цвет, секундная стрелка) или None для цифровых часов."""
+    if not is_analog(clock_cfg):
+        return None
+    seconds = compile_format(clock_cfg.get("time_format", "HH:mm:ss"), language).cadence == CADENCE_SECOND
+    return (face_size(clock_cfg), clock_cfg.get("color", "#FFFFFF"), seconds)
+
+
+def has_fraction(clock_cfg):
+    # Цифровые часы с долями секунды: доли выводит отдельная метка с частой перерисовкой
+    return not is_analog(clock_cfg) and bool(split_fraction(clock_cfg.get("time_format", "HH:mm:ss"))[1])
+
+
+def make_clock_view(app):
+    if app.cfg.get("renderer") == RENDERER_CANVAS:
+        from canvas_clock import CanvasClockView
+        return CanvasClockView(app)
+    return ClockWidget(app)
+
+
+class LabelRenderer:
+    """Запоминает последние применённые к меткам параметры (text, font, fg) и вызывает
+    label.config только для реально изменившихся полей."""
+
+    def __init__(self):
+        self._applied = {}  # метка -> словарь последних применённых параметров
+        # Счётчики вызовов Tk за последний тик и за всё время
+        self.tick_issued = 0
+        self.tick_skipped = 0
+        self.total_issued = 0
+        self.total_skipped = 0
+
+    def begin_tick(self):
+        self.tick_issued = 0
+        self.tick_skipped = 0
+
+    def apply(self, label, **options):
+        last = self._applied.setdefault(label, {})
+        changed = {key: value for key, value in options.items() if last.get(key, self) != value}
+        if not changed:
+            self.tick_skipped += 1
+            self.total_skipped += 1
+            return False
+        self.configure(label, changed)
+        last.update(changed)
+        self.tick_issued += 1
+        self.total_issued += 1
+        return True
+
+    def configure(self, label, options):
+        label.config(**options)
+
+    def remember(self, label, **options):
+        # Параметры, заданные при создании метки, не нужно применять повторно
+        self._applied.setdefault(label, {}).update(options)
+
+    def forget(self, label):
+        # Метка уничтожена или пересоздана — её состояние больше не действительно
+        self._applied.pop(label, None)
+
+    def reset(self):
+        self._applied.clear()
+
+    def stats(self):
+        return {"tick_issued": self.tick_issued, "tick_skipped": self.tick_skipped,
+                "total_issued": self.total_issued, "total_skipped": self.total_skipped}
+
 
 class ClockWidget:
     def __init__(self, app):
         # Инициализация виджета часов
         self.app = app
         self.clock_widgets = []
+        self.renderer = LabelRenderer()
+        self.fonts = FontRegistry(app.root)
+        self._label_chrome = None  # (по горизонтали, по вертикали): рамка и отступы метки
 
     def load_clocks_from_cfg(self):
-        # Загрузка часов из конфигурации
-        for widget in self.clock_widgets:
-            widget["frame"].destroy()
-        self.clock_widgets.clear()
-
+        # Сверка часов из конфигурации с уже созданными виджетами по id часов: существующие рамки
+        # переиспользуются и при необходимости переставляются, создаются и удаляются только
+        # добавленные и удалённые часы. Шрифты и цвета меток применяет таймер через renderer
+        family = self.app.cfg.get("global_font", DEFAULT_FONT)
+        existing = {widget["id"]: widget for widget in self.clock_widgets}
+        widgets = []
         for clock_cfg in self.app.cfg["clocks"]:
-            frame = tk.Frame(self.app.container, bg='black')
-            frame.pack(fill="x", padx=5, pady=(10, 15))
-
-            title_label = tk.Label(frame, text=clock_cfg.get("title", "Часы"), bg='black', fg=clock_cfg.get("color", "#FFFFFF"))
-            title_label.pack(anchor="w")
-
-            date_label = None
-            if clock_cfg.get("date_format", ""):
-                date_label = tk.Label(frame, text="", bg='black', fg=clock_cfg.get("color", "#FFFFFF"))
-                date_label.pack(anchor="w", pady=(2, 2))
-
-            time_label = tk.Label(frame, text="", bg='black', fg=clock_cfg.get("color", "#FFFFFF"))
-            time_label.pack(anchor="w")
-
-            clock_dict = {
-                "frame": frame,
-                "title_label": title_label,
-                "time_label": time_label
-            }
-            if date_label:
-                clock_dict["date_label"] = date_label
-            self.clock_widgets.append(clock_dict)
-
-        self.app.adjust_window_size()
\ No newline at end of file
+            widget = existing.pop(clock_cfg.get("id"), None)
+            if widget is None:
+                widget = self.create_clock(clock_cfg, family)
+            else:
+                self.update_clock(widget, clock_cfg, family)
+            widgets.append(widget)
+        for widget in existing.values():
+            self.destroy_clock(widget)
+        self.reorder([widget for widget in self.clock_widgets if widget["id"] not in existing], widgets)
+        self.clock_widgets = widgets
+
+        self.app.adjust_window_size()
+
+    def create_clock(self, clock_cfg, family):
+        # Рамка не упакована: место в контейнере ей назначает reorder
+        color = clock_cfg.get("color", "#FFFFFF")
+        frame = tk.Frame(self.app.container, bg='black')
+
+        title_font = self.fonts.get((clock_cfg.get("id"), "title"), family, clock_cfg.get("title_font_size", 12),
+                                    "bold")
+        title = clock_cfg.get("title", "Часы")
+        title_label = tk.Label(frame, text=title, bg='black', fg=color, font=title_font)
+        self.renderer.remember(title_label, text=title, fg=color, font=title_font)
+        title_label.pack(anchor="w")
+
+        widget = {
+            "id": clock_cfg.get("id"),
+            "frame": frame,
+            "title_label": title_label
+        }
+        self.add_time_display(widget, clock_cfg, family)
+        if clock_cfg.get("date_format", ""):
+            self.add_date_label(widget, clock_cfg, family)
+        return widget
+
+    def add_time_display(self, widget, clock_cfg, family):
+        # Время — метка или Canvas со стрелочным циферблатом; всегда последний элемент рамки
+        color = clock_cfg.get("color", "#FFFFFF")
+        key = face_key(clock_cfg, self.app.language)
+        if key:
+            size, color, seconds = key
+            time_label = tk.Canvas(widget["frame"], width=size, height=size, bg='black', highlightthickness=0, bd=0)
+            widget["face"] = AnalogFace(time_label, size, color, seconds)
+        elif has_fraction(clock_cfg):
+            # доли секунды — соседняя метка в той же строке, её перерисовывает FrameTicker
+            row = tk.Frame(widget["frame"], bg='black')
+            row.pack(anchor="w")
+            time_font = self.fonts.get((clock_cfg.get("id"), "time"), family, clock_cfg.get("font_size", 36))
+            for name in ("time_label", "fraction_label"):
+                label = tk.Label(row, text="", bg='black', fg=color, font=time_font)
+                self.renderer.remember(label, text="", fg=color, font=time_font)
+                label.pack(side="left")
+                widget[name] = label
+            widget["time_row"] = row
+            return
+        else:
+            time_font = self.fonts.get((clock_cfg.get("id"), "time"), family, clock_cfg.get("font_size", 36))
+            time_label = tk.Label(widget["frame"], text="", bg='black', fg=color, font=time_font)
+            self.renderer.remember(time_label, text="", fg=color, font=time_font)
+        time_label.pack(anchor="w")
+        widget["time_label"] = time_label
+
+    def remove_time_display(self, widget):
+        face = widget.pop("face", None)
+        if face:
+            face.destroy()
+        for name in ("time_label", "fraction_label", "time_row"):
+            if name in widget:
+                child = widget.pop(name)
+                self.renderer.forget(child)
+                child.destroy()
+
+    def update_clock(self, widget, clock_cfg, family):
+        self.renderer.apply(widget["title_label"], text=clock_cfg.get("title", "Часы"))
+        # Циферблат перерисовывается только при смене вида часов, размера, цвета или секундной стрелки
+        face = widget.get("face")
+        if (face_key(clock_cfg, self.app.language) != (face.key if face else None)
+                or has_fraction(clock_cfg) != ("fraction_label" in widget)):
+            self.remove_time_display(widget)
+            self.add_time_display(widget, clock_cfg, family)
+        # Метка даты добавляется или убирается, только когда формат даты становится пустым или непустым
+        if clock_cfg.get("date_format", "") and "date_label" not in widget:
+            self.add_date_label(widget, clock_cfg, family)
+        elif not clock_cfg.get("date_format", "") and "date_label" in widget:
+            self.remove_date_label(widget)
+
+    def add_date_label(self, widget, clock_cfg, family):
+        color = clock_cfg.get("color", "#FFFFFF")
+        date_font = self.fonts.get((clock_cfg.get("id"), "date"), family, clock_cfg.get("date_font_size", 12))
+        date_label = tk.Label(widget["frame"], text="", bg='black', fg=color, font=date_font)
+        self.renderer.remember(date_label, text="", fg=color, font=date_font)
+        date_label.pack(anchor="w", pady=DATE_PADY, before=widget.get("time_row", widget["time_label"]))
+        widget["date_label"] = date_label
+
+    def remove_date_label(self, widget):
+        label = widget.pop("date_label")
+        self.renderer.forget(label)
+        label.destroy()
+
+    def destroy_clock(self, widget):
+        for name in ("title_label", "date_label", "time_label", "fraction_label"):
+            if name in widget:
+                self.renderer.forget(widget[name])
+        widget["frame"].destroy()
+        self.fonts.release(widget["id"])
+
+    @staticmethod
+    def reorder(current, target):
+        """Упаковка рамок в порядке target; current — текущий порядок уже упакованных рамок.
+        Перепаковываются только новые и сдвинутые рамки."""
+        current = list(current)
+        for index, widget in enumerate(target):
+            if index < len(current) and current[index] is widget:
+                continue
+            if widget in current:
+                current.remove(widget)
+            if index:
+                place = {"after": target[index - 1]["frame"]}
+            elif current:
+                place = {"before": current[0]["frame"]}
+            else:
+                place = {}
+            widget["frame"].pack(fill="x", padx=FRAME_PADX, pady=FRAME_PADY, **place)
+            current.insert(index, widget)
+
+    def label_chrome(self):
+        # Рамка и внутренние отступы меток одинаковы для всех часов — читаются один раз
+        if self._label_chrome is None and self.clock_widgets:
+            label = self.clock_widgets[0]["title_label"]
+            border = int(label.cget("bd")) + int(label.cget("highlightthickness"))
+            self._label_chrome = (2 * (border + int(label.cget("padx"))), 2 * (border + int(label.cget("pady"))))
+        return self._label_chrome or (0, 0)
+
+    def required_size(self):
+        """Размер контейнера часов по метрикам шрифтов для самого широкого вывода каждого формата
+        (88:88:88, самое длинное название дня на текущем языке), без прохода раскладки Tk.
+        Не меняется от секунды к секунде, поэтому пересчитывается только при смене настроек."""
+        family = self.app.cfg.get("global_font", DEFAULT_FONT)
+        language = self.app.language
+        chrome_x, chrome_y = self.label_chrome()
+        fonts = self.fonts
+        width = height = 0
+        for clock_cfg, widgets in zip(self.app.cfg["clocks"], self.clock_widgets):
+            title_size = clock_cfg.get("title_font_size", 12)
+            time_size = clock_cfg.get("font_size", 36)
+            time_format = compile_format(clock_cfg.get("time_format", "HH:mm:ss"), language)
+            title_width = fonts.text_width(clock_cfg.get("title", "Часы"), family, title_size, "bold")
+            clock_height = fonts.linespace(family, title_size, "bold") + chrome_y
+            if "face" in widgets:
+                clock_width = max(title_width, widgets["face"].size - chrome_x)
+                clock_height += widgets["face"].size
+            else:
+                clock_width = max(title_width, fonts.format_width(time_format, family, time_size))
+                clock_height += fonts.linespace(family, time_size) + chrome_y
+                if "fraction_label" in widgets:
+                    clock_width += chrome_x  # две метки в строке
+            if "date_label" in widgets:
+                date_size = clock_cfg.get("date_font_size", 12)
+                date_format = compile_format(clock_cfg.get("date_format", ""), language)
+                clock_width = max(clock_width, fonts.format_width(date_format, family, date_size))
+                clock_height += fonts.linespace(family, date_size) + chrome_y + sum(DATE_PADY)
+            width = max(width, clock_width + chrome_x + 2 * FRAME_PADX)
+            height += clock_height + sum(FRAME_PADY)
+        return width, height
\ No newline at end of file
@@ -1,8 +1,20 @@
+import atexit
 import json
 import os
+import shutil
+import threading
+import uuid
+from collections import deque
+from journal import AlarmJournal, JOURNAL_SUFFIX
+from config_cache import ConfigCache
 
 # Путь к файлу конфигурации
 CONFIG_FILE = "clock_config.json"
+# Необязательное хранилище SQLite: используется, если база уже есть или задано CLOCK_STORAGE=sqlite
+SQLITE_FILE = "clock_config.db"
+STORAGE_ENV = "CLOCK_STORAGE"
+# Резервная копия последней успешно записанной конфигурации
+BACKUP_SUFFIX = ".bak"
 DEFAULT_FONT = "Arial"
 DEFAULT_LANGUAGE = "ru"
 
@@ -17,6 +29,9 @@ LANGUAGES = {
         "font_size": "Font size:",
         "title_font_size": "Title font size:",
         "date_font_size": "Date font size:",
+        "clock_style": "Clock style:",
+        "style_digital": "Digital",
+        "style_analog": "Analog",
         "color": "Color:",
         "timezone": "Timezone:",
         "choose_color": "Choose color",
@@ -37,6 +52,12 @@ LANGUAGES = {
         "default": "default",
         "stop": "Stop",
         "snooze": "Snooze 5 min",
+        "missed_alarms": "Missed alarms:",
+        "missed_policy": "If missed:",
+        "missed_fire": "Ring anyway",
+        "missed_summary": "Add to summary",
+        "missed_skip": "Skip silently",
+        "next_fire": "Next",
         "invalid_time": "Invalid time format",
         "invalid_date": "Invalid date format",
         "confirm_remove": "Remove selected clock?",
@@ -48,8 +69,8 @@ LANGUAGES = {
         "tooltip_move_down": "Move clock down",
         "date_format": "Date format",
         "time_format": "Time format",
-        "tooltip_date_format": "dd - day, MM - month, yyyy - year (4 digits), yy - year (2 digits), w - short day name, W - full day name",
-        "tooltip_time_format": "HH:mm:ss - 24-hour, hh:mm:ss p - 12-hour with AM/PM",
+        "tooltip_date_format": "dd - day, MM - month, yyyy - year (4 digits), yy - year (2 digits), w - short day name, W - full day name, 'text' - literal text, '' - single quote",
+        "tooltip_time_format": "HH:mm:ss - 24-hour, hh:mm:ss p - 12-hour with AM/PM, ss.f / ss.ff - tenths / hundredths of a second, 'text' - literal text, '' - single quote",
         "reset_default": "Reset to default",
         "exit": "Закрыть программу",
         "confirm_exit": "Are you sure you want to close the program?",
@@ -65,6 +86,9 @@ LANGUAGES = {
         "font_size": "Размер шрифта:",
         "title_font_size": "Размер шрифта заголовка:",
         "date_font_size": "Размер шрифта даты:",
+        "clock_style": "Вид часов:",
+        "style_digital": "Цифровые",
+        "style_analog": "Стрелочные",
         "color": "Цвет:",
         "timezone": "Часовой пояс:",
         "choose_color": "Выбрать цвет",
@@ -85,6 +109,12 @@ LANGUAGES = {
         "default": "по умолчанию",
         "stop": "Стоп",
         "snooze": "Отложить на 5 мин",
+        "missed_alarms": "Пропущенные будильники:",
+        "missed_policy": "Если пропущен:",
+        "missed_fire": "Всё равно прозвонить",
+        "missed_summary": "Показать в сводке",
+        "missed_skip": "Пропустить молча",
+        "next_fire": "Следующий",
         "invalid_time": "Неверный формат времени",
         "invalid_date": "Неверный формат даты",
         "confirm_remove": "Удалить выбранные часы?",
@@ -96,8 +126,8 @@ LANGUAGES = {
         "tooltip_move_down": "Переместить часы вниз",
         "date_format": "Формат даты",
         "time_format": "Формат времени",
-        "tooltip_date_format": "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня",
-        "tooltip_time_format": "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM",
+        "tooltip_date_format": "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня, 'текст' - текст как есть, '' - одиночная кавычка",
+        "tooltip_time_format": "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM, ss.f / ss.ff - десятые / сотые доли секунды, 'текст' - текст как есть, '' - одиночная кавычка",
         "reset_default": "По умолчанию",
         "exit": "Закрыть программу",
         "confirm_exit": "Вы действительно хотите закрыть программу?",
@@ -113,6 +143,9 @@ LANGUAGES = {
         "font_size": "Veličina fonta:",
         "title_font_size": "Veličina fonta naslova:",
         "date_font_size": "Veličina fonta datuma:",
+        "clock_style": "Izgled sata:",
+        "style_digital": "Digitalni",
+        "style_analog": "Analogni",
         "color": "Boja:",
         "timezone": "Vremenska zona:",
         "choose_color": "Izaberi boju",
@@ -133,6 +166,12 @@ LANGUAGES = {
         "default": "podrazumevano",
         "stop": "Stop",
         "snooze": "Odloži 5 min",
+        "missed_alarms": "Propušteni budilnici:",
+        "missed_policy": "Ako je propušten:",
+        "missed_fire": "Ipak zazvoni",
+        "missed_summary": "Prikaži u pregledu",
+        "missed_skip": "Preskoči tiho",
+        "next_fire": "Sledeći",
         "invalid_time": "Nevažeći format vremena",
         "invalid_date": "Nevažeći format datuma",
         "confirm_remove": "Ukloniti izabrani sat?",
@@ -144,8 +183,8 @@ LANGUAGES = {
         "tooltip_move_down": "Pomeri sat dole",
         "date_format": "Format datuma",
         "time_format": "Format vremena",
-        "tooltip_date_format": "dd - dan, MM - mesec, yyyy - godina (4 cifre), yy - godina (2 cifre), w - kratki naziv dana, W - puni naziv dana",
-        "tooltip_time_format": "HH:mm:ss - 24-časovni, hh:mm:ss p - 12-časovni sa AM/PM",
+        "tooltip_date_format": "dd - dan, MM - mesec, yyyy - godina (4 cifre), yy - godina (2 cifre), w - kratki naziv dana, W - puni naziv dana, 'tekst' - doslovan tekst, '' - jednostruki navodnik",
+        "tooltip_time_format": "HH:mm:ss - 24-časovni, hh:mm:ss p - 12-časovni sa AM/PM, ss.f / ss.ff - desetinke / stotinke sekunde, 'tekst' - doslovan tekst, '' - jednostruki navodnik",
         "reset_default": "Podrazumevano",
         "exit": "Закрыть программу",
         "confirm_exit": "Da li ste sigurni da želite zatvoriti program?",
@@ -161,8 +200,324 @@ LANGUAGE_FLAGS = {
     "sr_latn": "🇷🇸 Srpski (latinica)"
 }
 
+class WriterThread:
+    """Фоновый поток записи на диск: функции, поставленные через post(), выполняются в нём
+    по порядку. Поток запускается при первой задаче."""
+
+    thread_name = "writer"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._tasks = deque()  # функции для выполнения в потоке записи
+        self._busy = False
+        self._thread = None
+        self.errors = 0
+
+    def post(self, func):
+        with self._cond:
+            self._tasks.append(func)
+            self._start()
+            self._cond.notify_all()
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=5.0):
+        # Дождаться выполнения всего, что стоит в очереди (используется при выходе)
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._has_work() and not self._busy, timeout)
+
+    def _has_work(self):
+        return bool(self._tasks)
+
+    def _take(self):
+        # Вызывается под блокировкой: забрать всю очередь для одного прохода потока
+        tasks, self._tasks = self._tasks, deque()
+        return tasks
+
+    def _process(self, tasks):
+        for task in tasks:
+            try:
+                task()
+            except Exception as e:
+                self.errors += 1
+                print("Ошибка фоновой записи:", e)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(self._has_work)
+                work = self._take()
+                self._busy = True
+            try:
+                self._process(work)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+class AtomicWriter(WriterThread):
+    """Запись файла в отдельном потоке: временный файл, fsync и атомарная замена.
+    Предыдущая версия файла сохраняется как резервная копия (path + BACKUP_SUFFIX).
+    Через post() в том же потоке выполняется и другая запись на диск (журнал будильников)."""
+
+    thread_name = "config-writer"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.backup_path = path + BACKUP_SUFFIX
+        self._text = None  # последнее ещё не записанное содержимое
+        self._done = None  # что вызвать после его записи
+        self._current_valid = None  # читается ли файл на диске (None — ещё не проверяли)
+        self.written = 0
+
+    def submit(self, text, done=None):
+        # Поставить содержимое в очередь; более старое незаписанное содержимое заменяется.
+        # done() вызывается в потоке записи, когда файл записан
+        with self._cond:
+            self._text = text
+            self._done = done
+            self._start()
+            self._cond.notify_all()
+
+    def _has_work(self):
+        return self._text is not None or bool(self._tasks)
+
+    def _take(self):
+        text, self._text = self._text, None
+        done, self._done = self._done, None
+        return super()._take(), text, done
+
+    def _process(self, work):
+        # Функции из post() выполняются раньше содержимого файла, ожидающего записи:
+        # всё поставленное до submit() попадает на диск до снимка
+        tasks, text, done = work
+        super()._process(tasks)
+        if text is None:
+            return
+        try:
+            self.write(text)
+            self.written += 1
+            if done:
+                done()
+        except Exception as e:
+            self.errors += 1
+            print("Ошибка записи конфигурации:", e)
+
+    def write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # Резервной копией становится только читаемый текущий файл; сам он заменяется одним
+        # os.replace, так что при сбое на диске всегда остаётся либо старый, либо новый файл
+        if self.current_is_valid():
+            self.refresh_backup()
+        os.replace(tmp_path, self.path)
+        self._current_valid = True
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def current_is_valid(self):
+        # Файл, записанный этим потоком, заведомо читается; чужой проверяем один раз
+        if self._current_valid is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    json.load(f)
+                self._current_valid = True
+            except (OSError, ValueError):
+                self._current_valid = False
+        return self._current_valid
+
+    def refresh_backup(self):
+        # Жёсткая ссылка на текущий файл (или копия, если ссылки не поддерживаются) под временным
+        # именем, затем атомарная замена резервной копии
+        tmp_backup = self.backup_path + ".tmp"
+        if os.path.exists(tmp_backup):
+            os.remove(tmp_backup)
+        try:
+            os.link(self.path, tmp_backup)
+        except OSError:
+            shutil.copy2(self.path, tmp_backup)
+        os.replace(tmp_backup, self.backup_path)
+
+
+class ConfigStore:
+    """Отложенная запись конфигурации: помечает конфиг «грязным», объединяет частые
+    сохранения в одну запись и пишет файл только если содержимое изменилось."""
+
+    def __init__(self, path=CONFIG_FILE, delay_ms=1000, use_cache=True):
+        self.path = path
+        self.delay_ms = delay_ms
+        self.root = None
+        self._pending = None  # последний конфиг, ожидающий записи
+        self._timer = None
+        self._last_saved = None  # сериализованное содержимое файла на диске
+        self.writer = self.make_writer()
+        self.journal = None  # журнал будильников, который сворачивается в каждый снимок
+        # двоичный снимок нормализованной конфигурации для быстрого запуска
+        self.cache = ConfigCache(path) if use_cache else None
+        # Счётчики: записано на диск / пропущено без изменений / объединено в одну запись
+        self.flushed = 0
+        self.skipped = 0
+        self.coalesced = 0
+
+    def make_writer(self):
+        return AtomicWriter(self.path)
+
+    def attach(self, root):
+        # Отложенная запись через root.after; без root сохранение выполняется сразу
+        self.root = root
+
+    def attach_journal(self, journal):
+        self.journal = journal
+
+    def alarm_log(self):
+        # Журнал изменений будильников рядом с файлом конфигурации; сворачивается в каждый снимок
+        self.attach_journal(AlarmJournal(self.path + JOURNAL_SUFFIX, writer=self.writer))
+        return self.journal
+
+    def load(self):
+        return read_config_file(self.path)
+
+    def remember(self, cfg):
+        # Запоминаем содержимое, уже лежащее на диске, чтобы не перезаписывать его
+        self._last_saved = self.serialize(cfg)
+
+    def remember_text(self, text):
+        self._last_saved = text
+
+    @staticmethod
+    def serialize(cfg):
+        # Объекты с to_dict (например, будильники Alarm) записываются в прежнем JSON-формате
+        return json.dumps(cfg, ensure_ascii=False, indent=2, default=lambda obj: obj.to_dict())
+
+    def save(self, cfg):
+        # Пометить конфиг изменённым и запланировать запись
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = cfg
+        if self.root is None:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.root.after(self.delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self.flush()
+
+    def flush(self, wait=False):
+        # Немедленная запись ожидающих изменений; wait=True дожидается записи на диск (при выходе)
+        if self._timer is not None and self.root is not None:
+            try:
+                self.root.after_cancel(self._timer)
+            except Exception:
+                pass
+            self._timer = None
+        if self._pending is None:
+            written = False
+        else:
+            cfg, self._pending = self._pending, None
+            written = self.write(cfg)
+        if wait:
+            self.wait()
+        return written
+
+    def write(self, cfg):
+        # Сериализуем в потоке UI (конфиг меняется только здесь), пишем в фоновом потоке
+        after_write = []
+        if self.journal is not None:
+            # снимок содержит все записи журнала до этого номера; после записи журнал усекается
+            seq = self.journal.stamp(cfg)
+            after_write.append(lambda: self.journal.compacted(seq))
+        text = self.serialize(cfg)
+        if text == self._last_saved:
+            # тот же номер журнала уже в снимке (или в очереди записи) — его запись и усечёт журнал
+            self.skipped += 1
+            return False
+        if self.cache is not None:
+            # снимок для быстрого запуска обновляется вслед за JSON, иначе он устаревал бы после каждой записи
+            blob = self.cache.pack(cfg)
+            data = text.encode("utf-8")
+            after_write.append(lambda: self.cache.store(blob, data))
+        self.writer.submit(text, lambda: [callback() for callback in after_write])
+        self._last_saved = text
+        self.flushed += 1
+        return True
+
+    def wait(self):
+        self.writer.wait()
+
+    @property
+    def dirty(self):
+        return self._pending is not None
+
+    def stats(self):
+        return {"flushed": self.flushed, "skipped": self.skipped, "coalesced": self.coalesced,
+                "written": self.writer.written, "errors": self.writer.errors}
+
+
+def storage_backend():
+    # JSON — по умолчанию; SQLite включается переменной окружения или уже созданной базой
+    if os.environ.get(STORAGE_ENV, "").lower() == "sqlite" or os.path.exists(SQLITE_FILE):
+        return "sqlite"
+    return "json"
+
+
+def make_config_store():
+    if storage_backend() == "sqlite":
+        from sqlite_store import SqliteConfigStore
+        return SqliteConfigStore(SQLITE_FILE, json_path=CONFIG_FILE)
+    return ConfigStore()
+
+
+def read_config_file(path):
+    # Чтение JSON-конфигурации; при повреждённом файле используется резервная копия
+    for candidate in (path, path + BACKUP_SUFFIX):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with open(candidate, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print("Ошибка чтения конфигурации", candidate, ":", e)
+    return None
+
+
+def new_clock_id():
+    return uuid.uuid4().hex[:12]
+
+
+def ensure_clock_ids(clocks):
+    # Постоянный id часов: по нему виджеты часов переиспользуются при смене настроек.
+    # Возвращает True, если какие-то id пришлось выдать
+    assigned = False
+    for clock in clocks:
+        if not clock.get("id"):
+            clock["id"] = new_clock_id()
+            assigned = True
+    return assigned
+
+
 def load_config():
-    # Загрузка конфигурации из файла
+    # Загрузка конфигурации: при неизменном JSON — готовая конфигурация из двоичного снимка
+    cache = config_store.cache
+    cached = cache.load() if cache is not None else None
+    if cached is not None:
+        cfg, text = cached
+        config_store.remember_text(text)
+        return cfg
+
     cfg = {
         "window": {"x": 100, "y": 100, "width": 300, "height": 200},
         "clocks": [
@@ -181,22 +536,35 @@ def load_config():
         "alarms": [],
         "language": DEFAULT_LANGUAGE
     }
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-                cfg.update(loaded)
-                for clock in cfg.get("clocks", []):
-                    if "date_font_size" not in clock:
-                        clock["date_font_size"] = 12
-        except Exception as e:
-            pass
+    loaded = config_store.load()
+    if isinstance(loaded, dict):
+        config_store.remember(loaded)
+        cfg.update(loaded)
+        for clock in cfg.get("clocks", []):
+            if "date_font_size" not in clock:
+                clock["date_font_size"] = 12
+    missing_ids = ensure_clock_ids(cfg.get("clocks", []))
+    # Будильники разбираются и проверяются здесь, тёплый запуск получает их уже готовыми
+    from alarm_model import load_alarms
+    raw_alarms = cfg.get("alarms") or []
+    cfg["alarms"] = load_alarms(raw_alarms)
+    if missing_ids or any(isinstance(item, dict) and not item.get("id") for item in raw_alarms):
+        # выданные при разборе id должны попасть в файл, иначе журнал будильников на них не сошлётся
+        save_config(cfg)
+    elif cache is not None and isinstance(loaded, dict) and os.path.exists(config_store.path):
+        with open(config_store.path, "rb") as f:
+            cache.store(cache.pack(cfg), f.read())
     return cfg
 
 def save_config(cfg):
-    # Сохранение конфигурации в файл
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        pass
\ No newline at end of file
+    # Сохранение конфигурации в файл (запись откладывается и выполняется только при изменениях)
+    config_store.save(cfg)
+
+
+def flush_config():
+    # Немедленная запись отложенных изменений перед выходом: ждём окончания фоновой записи
+    return config_store.flush(wait=True)
+
+
+config_store = make_config_store()
+atexit.register(lambda: config_store.flush(wait=True))
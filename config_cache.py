@@ -0,0 +1,81 @@
+import hashlib
+import os
+import pickle
+
+CACHE_SUFFIX = ".cache"
+# Увеличивается при изменении формата снимка или нормализации конфигурации
+CACHE_VERSION = 2
+
+
+def file_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ConfigCache:
+    """Двоичный снимок уже проверенной и дополненной значениями по умолчанию конфигурации.
+
+    Лежит рядом с JSON (path + CACHE_SUFFIX) и действителен, пока у JSON-файла те же время
+    изменения, размер и хэш содержимого. Тёплый запуск берёт конфигурацию из снимка без разбора
+    JSON, подстановки значений по умолчанию и разбора будильников."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cache_path = path + CACHE_SUFFIX
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """(конфигурация, текст JSON) из снимка или None, если снимка нет или он устарел."""
+        try:
+            stat = os.stat(self.path)
+            with open(self.cache_path, "rb") as f:
+                snapshot = pickle.load(f)
+            if (snapshot.get("version") != CACHE_VERSION or snapshot.get("mtime_ns") != stat.st_mtime_ns
+                    or snapshot.get("size") != stat.st_size):
+                self.misses += 1
+                return None
+            with open(self.path, "rb") as f:
+                data = f.read()
+            if snapshot.get("digest") != file_digest(data):
+                self.misses += 1
+                return None
+            cfg = pickle.loads(snapshot["cfg"])
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print("Снимок конфигурации не прочитан:", e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cfg, data.decode("utf-8")
+
+    @staticmethod
+    def pack(cfg):
+        # Сериализация выполняется в потоке UI, пока конфигурация не меняется
+        return pickle.dumps(cfg, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def store(self, blob, data):
+        """Запомнить упакованную (pack) конфигурацию для JSON-файла с содержимым data (bytes).
+        Вызывается после записи JSON, в т.ч. из потока записи."""
+        try:
+            stat = os.stat(self.path)
+            snapshot = {
+                "version": CACHE_VERSION,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "digest": file_digest(data),
+                "cfg": blob,
+            }
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print("Снимок конфигурации не сохранён:", e)
+
+    def invalidate(self):
+        try:
+            os.remove(self.cache_path)
+        except FileNotFoundError:
+            pass
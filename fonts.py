@@ -0,0 +1,92 @@
+import tkinter.font as tkfont
+
+DIGITS = "0123456789"
+
+
+def font_key(family, size, weight="normal"):
+    """Нормализованный ключ шрифта: (семейство, размер, насыщенность)."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = 12
+    return (family or "Arial", size, weight or "normal")
+
+
+class FontRegistry:
+    """Именованные шрифты tkinter по ролям: у каждой роли (часы и поле — заголовок, время, дата) свой Font.
+    Метки получают готовый объект Font, поэтому Tk не разбирает кортеж шрифта при каждом обновлении;
+    смена размера, насыщенности или семейства перенастраивает Font роли на месте, и все его метки
+    обновляются одним вызовом. Шрифты удалённых часов освобождаются (release)."""
+
+    def __init__(self, root):
+        self.root = root
+        self._fonts = {}  # (часы, роль) -> [ключ, tkinter.font.Font]
+        self._digit_widths = {}  # ключ -> ширина самой широкой цифры
+        self._linespaces = {}  # ключ -> высота строки
+        self._format_widths = {}  # (ключ, формат, язык) -> ширина самого широкого вывода
+
+    def get(self, owner, family, size, weight="normal"):
+        """Font роли owner (например, (id часов, "time")) с нужными параметрами."""
+        key = font_key(family, size, weight)
+        entry = self._fonts.get(owner)
+        if entry is None:
+            font = tkfont.Font(root=self.root, family=key[0], size=key[1], weight=key[2])
+            self._fonts[owner] = [key, font]
+            return font
+        if entry[0] != key:
+            changed = {name: value for name, value, old in zip(("family", "size", "weight"), key, entry[0])
+                       if value != old}
+            entry[1].configure(**changed)
+            entry[0] = key
+        return entry[1]
+
+    def release(self, clock_id):
+        # Шрифты удалённых часов: Tk удаляет именованный шрифт вместе с последней ссылкой на Font
+        for owner in [owner for owner in self._fonts if owner[0] == clock_id]:
+            del self._fonts[owner]
+
+    def set_family(self, family):
+        # Смена семейства шрифтов: существующие Font перенастраиваются на месте,
+        # все метки, которые их используют, обновляются одним вызовом на шрифт
+        family = family or "Arial"
+        for entry in self._fonts.values():
+            old_family, size, weight = entry[0]
+            if old_family != family:
+                entry[1].configure(family=family)
+                entry[0] = (family, size, weight)
+
+    def measure_font(self, key):
+        # Шрифт только для измерений: меткам не выдаётся и удаляется вместе с объектом,
+        # результаты измерений кэшируются по ключу
+        return tkfont.Font(root=self.root, family=key[0], size=key[1], weight=key[2])
+
+    def digit_width(self, family, size, weight="normal"):
+        # Ширина самой широкой цифры (кэшируется для каждого шрифта)
+        key = font_key(family, size, weight)
+        width = self._digit_widths.get(key)
+        if width is None:
+            font = self.measure_font(key)
+            width = max(font.measure(d) for d in DIGITS)
+            self._digit_widths[key] = width
+        return width
+
+    def linespace(self, family, size, weight="normal"):
+        key = font_key(family, size, weight)
+        value = self._linespaces.get(key)
+        if value is None:
+            value = self.measure_font(key).metrics("linespace")
+            self._linespaces[key] = value
+        return value
+
+    def format_width(self, compiled, family, size, weight="normal"):
+        # Ширина самого широкого вывода скомпилированного формата (кэшируется)
+        key = font_key(family, size, weight)
+        cache_key = (key, compiled.pattern, compiled.language)
+        width = self._format_widths.get(cache_key)
+        if width is None:
+            width = compiled.max_width(self.measure_font(key).measure, self.digit_width(*key))
+            self._format_widths[cache_key] = width
+        return width
+
+    def text_width(self, text, family, size, weight="normal"):
+        return self.measure_font(font_key(family, size, weight)).measure(text)
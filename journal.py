@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+# Ключ конфигурации: номер последней записи журнала, уже вошедшей в снимок
+JOURNAL_SEQ_KEY = "alarms_journal_seq"
+# После скольких записей журнал сворачивается в снимок конфигурации
+COMPACT_AFTER = 200
+
+
+class AlarmJournal:
+    """Журнал изменений будильников: одна строка JSON на изменение, файл только дописывается.
+
+    Состояние будильников — снимок в конфигурации плюс записи журнала с номерами больше
+    сохранённого в снимке. Изменение будильника стоит одной короткой записи вместо перезаписи
+    всего конфига. Записи копятся в буфере и дописываются в потоке записи конфигурации одним
+    fsync на пачку; там же после записи нового снимка журнал усекается."""
+
+    def __init__(self, path, compact_after=COMPACT_AFTER, writer=None):
+        self.path = path
+        self.compact_after = compact_after
+        self.writer = writer  # поток записи (AtomicWriter); без него записи пишутся сразу
+        self._lock = threading.Lock()  # номера записей и буфер
+        self._io_lock = threading.Lock()  # файл журнала
+        self._buffer = []  # строки, ещё не дописанные в файл
+        self._file = None
+        self.seq = 0  # номер последней записи
+        self.pending = 0  # записей, ещё не вошедших в снимок
+        self.appended = 0
+        self.compactions = 0
+
+    # --- восстановление ---
+
+    def read(self):
+        """Записи журнала по порядку; оборванная при сбое последняя строка пропускается."""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print("Пропущена повреждённая запись журнала:", line[:80])
+        return records
+
+    def replay(self, alarms, since=0, checked_at=None):
+        """Снимок будильников (список словарей) + записи журнала после since -> (будильники, checked_at).
+
+        Записи идемпотентны (put — полное состояние будильника, del, reset), поэтому повторное
+        применение уже вошедших в снимок записей ничего не меняет."""
+        since = since or 0
+        state = {}
+        for index, item in enumerate(alarms or []):
+            # снимок может содержать словари из JSON или уже разобранные Alarm
+            key = item.get("id") if isinstance(item, dict) else getattr(item, "id", None)
+            state[key or f"#{index}"] = item
+        self.seq = since
+        self.pending = 0
+        for record in self.read():
+            seq = record.get("seq", 0)
+            self.seq = max(self.seq, seq)
+            if seq <= since:
+                continue
+            self.pending += 1
+            op = record.get("op")
+            if op == "put" and isinstance(record.get("alarm"), dict):
+                alarm = record["alarm"]
+                state[alarm.get("id")] = alarm
+            elif op == "del":
+                state.pop(record.get("id"), None)
+            elif op == "reset":
+                state = {alarm.get("id"): alarm for alarm in record.get("alarms", []) if isinstance(alarm, dict)}
+            elif op == "checked":
+                checked_at = record.get("at", checked_at)
+        return list(state.values()), checked_at
+
+    # --- запись ---
+
+    def put(self, alarm, next_fire=None):
+        # next_fire нужен только индексу хранилища SQLite
+        self.append({"op": "put", "alarm": alarm.to_dict()})
+
+    def delete(self, alarm_id):
+        self.append({"op": "del", "id": alarm_id})
+
+    def reset(self, alarms):
+        self.append({"op": "reset", "alarms": [alarm.to_dict() for alarm in alarms]})
+
+    def checked(self, at):
+        self.append({"op": "checked", "at": int(at)})
+
+    def fired(self, alarm, when, missed=False):
+        # История срабатываний ведётся только в SQLite; здесь достаточно Alarm.last_fired
+        pass
+
+    def reindex(self, alarms, next_fire):
+        pass
+
+    def append(self, record):
+        with self._lock:
+            self.seq += 1
+            record["seq"] = self.seq
+            self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+            self.pending += 1
+            self.appended += 1
+            # запись буфера уже поставлена в очередь, если в нём есть и другие строки
+            scheduled = len(self._buffer) > 1
+        if self.writer is None:
+            self.write_buffer()
+        elif not scheduled:
+            self.writer.post(self.write_buffer)
+
+    def write_buffer(self):
+        # Все накопившиеся записи — одна запись в файл и один fsync
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        with self._io_lock:
+            try:
+                f = self._open()
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError as e:
+                print("Ошибка записи журнала будильников:", e)
+
+    def _open(self):
+        if self._file is None:
+            # если последняя строка оборвана сбоем, новая запись начинается с новой строки
+            broken = False
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    broken = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if broken:
+                self._file.write("\n")
+        return self._file
+
+    @property
+    def needs_compaction(self):
+        return self.pending >= self.compact_after
+
+    # --- сворачивание в снимок ---
+
+    def stamp(self, cfg):
+        # Вызывается при сериализации снимка: запоминаем, какие записи в него вошли
+        cfg[JOURNAL_SEQ_KEY] = self.seq
+        return self.seq
+
+    def compacted(self, seq):
+        """Снимок с записями до seq включительно записан на диск (вызывается из потока записи)."""
+        with self._lock:
+            if seq != self.seq:
+                # после снимка появились новые записи — журнал усечём при следующем снимке
+                self.pending = self.seq - seq
+                return
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                open(self.path, "w", encoding="utf-8").close()
+            except OSError as e:
+                print("Ошибка усечения журнала будильников:", e)
+                return
+        with self._lock:
+            # записи после снимка ещё в буфере, их допишет следующая пачка
+            self.pending = self.seq - seq
+            self.compactions += 1
+
+    def close(self):
+        self.write_buffer()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,26 +1,75 @@
+import time
+
+# Отметка начала запуска для --profile-startup (до остальных импортов)
+STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pytz
 from datetime import datetime
-import time
 import sys
-from config import load_config, save_config, LANGUAGES, DEFAULT_FONT, DEFAULT_LANGUAGE
-from clock_widgets import ClockWidget
-from alarms import AlarmsSettingsWindow
-from settings import SettingsWindow
+from functools import partial
+from config import (load_config, save_config, flush_config, config_store, new_clock_id, LANGUAGES, DEFAULT_FONT,
+                    DEFAULT_LANGUAGE)
+from clock_widgets import make_clock_view
+from time_format import compile_format, split_fraction, CADENCE_SECOND, CADENCE_MINUTE
+from tick_scheduler import TickScheduler, FrameTicker, DEFAULT_MAX_FPS
+from alarm_scheduler import AlarmScheduler
+from recurrence import alarm_rule, ONCE
+from alarm_model import Alarm
+from alarm_store import AlarmStore, REMOVED, RESET
+from journal import JOURNAL_SEQ_KEY
+from timezones import local_zone_name, now_in, DEFAULT_TIMEZONE
 import locale
 
+# Окна будильников и настроек (а с ними tkcalendar и полный список поясов) импортируются
+# при первом открытии — для первой отрисовки часов они не нужны
+
+
+class StartupProfile:
+    """Разбивка времени запуска по этапам для --profile-startup."""
+
+    def __init__(self, started):
+        self.last = self.started = started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"{phase:<16}{elapsed * 1000:8.1f} мс" for phase, elapsed in self.phases]
+        lines.append(f"{'итого':<16}{(self.last - self.started) * 1000:8.1f} мс")
+        loaded = [name for name in ("alarms", "settings", "tkcalendar") if name in sys.modules]
+        lines.append("загружены при запуске: " + (", ".join(loaded) if loaded else "-"))
+        return "\n".join(lines)
+
 
 class DigitalClockApp:
-    def __init__(self, root):
+    def __init__(self, root, profile=None):
         # Инициализация главного окна приложения
         self.root = root
+        self.profile = profile
         self.root.configure(bg='black')
         self.root.attributes('-transparentcolor', 'black')  # Установка прозрачного фона
         self.root.overrideredirect(True)  # Убираем рамку окна
 
-        # Загрузка конфигурации
+        # Загрузка конфигурации; запись на диск откладывается через root.after
+        config_store.attach(self.root)
         self.cfg = load_config()
+        # Будильники: снимок из конфигурации плюс журнал изменений после него (в SQLite — строки таблицы).
+        # Разбираются и проверяются один раз при загрузке; хранилище общее для всей программы
+        self.journal = config_store.alarm_log()
+        alarms, checked_at = self.journal.replay(self.cfg.get("alarms", []), since=self.cfg.get(JOURNAL_SEQ_KEY),
+                                                 checked_at=self.cfg.get("alarms_checked_at"))
+        self.alarm_store = AlarmStore(alarms)
+        self.cfg["alarms"] = self.alarm_store
+        if checked_at is not None:
+            self.cfg["alarms_checked_at"] = checked_at
+        if self.journal.pending:
+            # восстановленное состояние сразу сворачиваем в снимок
+            save_config(self.cfg)
+        self.mark("config")
         self.language = self.cfg.get("language", DEFAULT_LANGUAGE)
         self.l10n = LANGUAGES.get(self.language, LANGUAGES["en"])
 
@@ -37,6 +86,8 @@ class DigitalClockApp:
         self.height = w.get("height", 200)
         self.root.geometry(f"{self.width}x{self.height}+{self.x}+{self.y}")
 
+        self.applied_size = None  # последний заданный adjust_window_size размер окна
+        self.controls_height = None
         self.dragging = False
         self.resizing = False
         self.start_x = 0
@@ -68,41 +119,60 @@ class DigitalClockApp:
         self.root.bind("<ButtonRelease-1>", self.stop_drag_root)
 
         # Инициализация виджетов часов
-        self.clock_widgets = ClockWidget(self)
+        self.clock_widgets = make_clock_view(self)
         self.alarms = None  # Инициализация атрибута
+        self.settings = None  # окно настроек, создаётся при первом открытии
+        self.alarm_scheduler = AlarmScheduler(self.root, on_fire=self.fire_alarm, on_missed=self.on_alarms_missed,
+                                              on_skipped=self.mark_missed)
         self.set_default_timezone()
         self.clock_widgets.load_clocks_from_cfg()
         self.update_bell_icon()
-        self.update_time_loop()
-
-        self.check_alarms()
+        self.mark("widgets")
+        # Счётчики renderer за тик описывают тик часов: их обнуляет только TickScheduler
+        self.ticker = TickScheduler(self.root, on_tick=self.clock_widgets.renderer.begin_tick)
+        # Доли секунды рисуются отдельным частым таймером; частота ограничена cfg["max_fps"]
+        self.frames = FrameTicker(self.root, max_fps=self.cfg.get("max_fps", DEFAULT_MAX_FPS))
+        self.schedule_clocks()
+        if self.profile:
+            # дожидаемся отрисовки первого кадра
+            self.root.update_idletasks()
+        self.mark("first tick")
+
+        # Срабатывания после последней проверки (в т.ч. пока программа была закрыта) считаются пропущенными
+        self.alarm_scheduler.attach(self.alarm_store, since=self.cfg.get("alarms_checked_at"))
+        self.journal.reindex(self.alarm_store, self.alarm_store.next_fire)
+        self.alarm_store.subscribe(self.on_alarms_changed)
+        self.mark("alarm schedule")
+
+    def mark(self, phase):
+        if self.profile:
+            self.profile.mark(phase)
 
     def open_alarms_window(self):
+        from alarms import AlarmsSettingsWindow
         if not hasattr(self, "alarms") or self.alarms is None or not self.alarms.win.winfo_exists():
             self.alarms = AlarmsSettingsWindow(
                 self.root,
                 bell_label=self.bell_label,
                 cfg=self.cfg,
                 l10n=self.l10n,
-                update_callback=self.on_alarms_closed
+                update_callback=self.on_alarms_closed,
+                store=self.alarm_store
             )
         else:
             self.alarms.win.deiconify()
 
     def on_alarms_closed(self, data):
-        # получили все изменения из окна будильников
-        self.cfg["alarms"] = data["alarms"]
+        # будильники окно правит прямо в хранилище, запоминаем только положение окна
         self.cfg["alarms_window"] = data["alarms_window"]
+        save_config(self.cfg)
 
     def set_default_timezone(self):
         # Установка часового пояса по умолчанию, если часы не настроены
         if not self.cfg.get("clocks"):
-            try:
-                local_tz = time.tzname[0]
-                tz = pytz.timezone(local_tz) if local_tz in pytz.all_timezones else "Europe/Moscow"
-            except:
-                tz = "Europe/Moscow"
+            tz = local_zone_name(DEFAULT_TIMEZONE)
             self.cfg["clocks"] = [{
+                "id": new_clock_id(),
                 "title": "Москва",
                 "font": DEFAULT_FONT,
                 "font_size": 36,
@@ -116,14 +186,19 @@ class DigitalClockApp:
             save_config(self.cfg)
 
     def adjust_window_size(self):
-        # Настройка размера окна на основе содержимого
-        self.root.update_idletasks()
-        req_width = self.container.winfo_reqwidth()
-        req_height = self.container.winfo_reqheight() + self.controls_frame.winfo_reqheight()
-        self.width = max(150, req_width)
-        self.height = max(100, req_height)
+        # Размер окна по метрикам шрифтов; вызывается только при изменении раскладки
+        # (часы добавлены или удалены, смена шрифта, формата или языка), а не на каждом тике
+        if self.controls_height is None:
+            # панель кнопок не меняется — её высота измеряется один раз
+            self.controls_frame.update_idletasks()
+            self.controls_height = self.controls_frame.winfo_reqheight()
+        req_width, req_height = self.clock_widgets.required_size()
+        width = max(150, req_width)
+        height = max(100, req_height + self.controls_height)
+        if (width, height) == self.applied_size:
+            return
+        self.width, self.height = self.applied_size = width, height
         self.root.geometry(f"{self.width}x{self.height}+{self.x}+{self.y}")
-        save_config(self.cfg)
 
     def start_drag_root(self, event):
         # Начало перетаскивания окна
@@ -162,162 +237,176 @@ class DigitalClockApp:
         self.cfg["window"]["height"] = self.height
         save_config(self.cfg)
 
-    def convert_format(self, user_format, now):
-        """Преобразование пользовательского формата в строку с текущими значениями времени/даты"""
-        if not user_format:
-            return ""
-        # Получение базовых значений времени и даты
-        hour_24 = now.strftime("%H")
-        hour_12 = now.strftime("%I")
-        minute = now.strftime("%M")
-        second = now.strftime("%S")
-        day = now.strftime("%d")
-        month = now.strftime("%m")
-        year_full = now.strftime("%Y")
-        year_short = now.strftime("%y")
-
-        # Определение AM/PM на основе 24-часового формата
-        am_pm = "AM" if int(hour_24) < 12 else "PM"
-
-        # Получение дней недели из словаря локализации
-        days_short = LANGUAGES[self.language].get("days_short", ["Sat", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri"])
-        days_full = LANGUAGES[self.language].get("days_full",
-                                                 ["Saturday", "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday",
-                                                  "Friday"])
-        weekday = now.weekday()
-        # Корректировка индекса: weekday() возвращает 0 для понедельника, а массив начинается с субботы
-        # Для воскресенья (6) должно быть 1, поэтому используем (weekday + 6) % 7
-        adjusted_weekday = (weekday+1) % 7 #Не знаю почему, но нужно добавить 1
-        day_short = days_short[adjusted_weekday]
-        day_full = days_full[adjusted_weekday]
-
-        # Замена токенов
-        result = user_format
-        result = result.replace("HH", hour_24).replace("H", hour_24)
-        result = result.replace("hh", hour_12).replace("h", hour_12)
-        result = result.replace("mm", minute).replace("m", minute)
-        result = result.replace("ss", second).replace("s", second)
-        # Обработка p в любом месте строки
-        if "p" in result:
-            result = result.replace("p", am_pm)
-            # Применяем 12-часовой формат, если есть h/hh
-            if "hh" in user_format or "h" in user_format:
-                result = result.replace("HH", hour_12).replace("H", hour_12)
-        result = result.replace("dd", day)
-        result = result.replace("MM", month)
-        result = result.replace("yyyy", year_full)
-        result = result.replace("yy", year_short)
-        result = result.replace("w", day_short)
-        result = result.replace("W", day_full)
-        return result
-
-    def update_time_loop(self):
-        # Обновление времени и даты для всех часов с учётом часового пояса
+    def schedule_clocks(self):
+        # Время и дата каждых часов регистрируются в общем таймере со своей частотой обновления:
+        # формат без секунд перерисовывается раз в минуту, дата — в полночь по поясу часов
+        self.ticker.clear()
+        self.frames.clear()
+        fonts = self.clock_widgets.fonts
+        global_font = self.cfg.get("global_font", DEFAULT_FONT)
+        render = self.clock_widgets.renderer.apply
         for idx, cw in enumerate(self.clock_widgets.clock_widgets):
             if idx >= len(self.cfg["clocks"]):
                 break
             clock_cfg = self.cfg["clocks"][idx]
-            tz_name = clock_cfg.get("timezone", "Europe/Moscow")
-            try:
-                tz = pytz.timezone(tz_name)
-                # Создаём now с учётом часового пояса
-                now = datetime.now(tz)
-                time_str = self.convert_format(clock_cfg.get("time_format", "HH:mm:ss"), now)
-                date_str = self.convert_format(clock_cfg.get("date_format", "dd-MM-yyyy"), now)
-            except pytz.exceptions.UnknownTimeZoneError:
-                now = datetime.now()
-                time_str = self.convert_format(clock_cfg.get("time_format", "HH:mm:ss"), now)
-                date_str = self.convert_format(clock_cfg.get("date_format", "dd-MM-yyyy"), now)
-            global_font = self.cfg.get("global_font", "Arial")
-            date_font_size = clock_cfg.get("date_font_size", 12)
-            if "date_label" in cw and date_str:
-                cw["date_label"].config(
-                    text=date_str,
-                    font=(global_font, date_font_size),
-                    fg=clock_cfg.get("color", "#FFFFFF")
-                )
-            elif "date_label" in cw:
-                cw["date_label"].config(text="")
-            cw["time_label"].config(
-                text=time_str,
-                font=(global_font, clock_cfg.get("font_size", 36)),
-                fg=clock_cfg.get("color", "#FFFFFF")
-            )
-            cw["title_label"].config(
-                font=(global_font, clock_cfg.get("title_font_size", 12), "bold"),
-                fg=clock_cfg.get("color", "#FFFFFF")
-            )
-        self.adjust_window_size()
-        self.root.after(1000, self.update_time_loop)
+            tz_name = clock_cfg.get("timezone", DEFAULT_TIMEZONE)
+            color = clock_cfg.get("color", "#FFFFFF")
+            clock_id = clock_cfg.get("id")
+            render(cw["title_label"], font=fonts.get((clock_id, "title"), global_font,
+                                                      clock_cfg.get("title_font_size", 12), "bold"), fg=color)
+            time_format = compile_format(clock_cfg.get("time_format", "HH:mm:ss"), self.language)
+            if "face" in cw:
+                # стрелки двигаются раз в секунду, если формат времени показывает секунды, иначе раз в минуту
+                face = cw["face"]
+                self.ticker.add((idx, "time"), CADENCE_SECOND if face.seconds else CADENCE_MINUTE,
+                                partial(self.render_face, face, tz_name), tz_name)
+            else:
+                time_font = fonts.get((clock_id, "time"), global_font, clock_cfg.get("font_size", 36))
+                if "fraction_label" in cw:
+                    # Пока показаны доли секунды, всё время рисует FrameTicker: обе части берутся из одного
+                    # момента, иначе около границы секунды доли успевают обнулиться раньше секунд.
+                    # Неизменившуюся основную часть renderer в Tk не передаёт
+                    head, tail = split_fraction(time_format.pattern)
+                    fraction = compile_format(tail, self.language)
+                    self.frames.add((idx, "time"), round(1 / fraction.cadence),
+                                    partial(self.render_split, cw["time_label"], compile_format(head, self.language),
+                                            cw["fraction_label"], fraction, tz_name, time_font, color))
+                else:
+                    self.ticker.add((idx, "time"), time_format.cadence,
+                                    partial(self.render_field, cw["time_label"], time_format, tz_name, time_font,
+                                            color), tz_name)
+            if "date_label" in cw:
+                date_format = compile_format(clock_cfg.get("date_format", "dd-MM-yyyy"), self.language)
+                self.ticker.add((idx, "date"), date_format.cadence,
+                                partial(self.render_field, cw["date_label"], date_format, tz_name,
+                                        fonts.get((clock_id, "date"), global_font,
+                                                  clock_cfg.get("date_font_size", 12)),
+                                        color), tz_name)
+        self.ticker.refresh()
+        self.frames.start()
+
+    def render_face(self, face, tz_name):
+        face.show(now_in(tz_name))
+
+    def render_field(self, label, compiled, tz_name, font, color):
+        # Объект часового пояса берётся из кэша; неизвестный пояс — локальное время.
+        # Tk вызывается только для изменившихся полей метки
+        text = compiled.render(now_in(tz_name)) if compiled.pattern else ""
+        self.clock_widgets.renderer.apply(label, text=text, font=font, fg=color)
+
+    def render_split(self, head_label, head, fraction_label, fraction, tz_name, font, color):
+        # Основная часть и доли секунды по одному now
+        now = now_in(tz_name)
+        render = self.clock_widgets.renderer.apply
+        render(head_label, text=head.render(now) if head.pattern else "", font=font, fg=color)
+        render(fraction_label, text=fraction.render(now), font=font, fg=color)
 
     def update_bell_icon(self):
         # Обновление значка будильника (🔔/🔕)
-        active_any = False
-        if self.alarms and hasattr(self.alarms, 'alarms'):
-            active_any = any(a.get("active", False) for a in self.alarms.alarms)
+        active_any = any(a.active for a in self.alarm_store)
         self.bell_label.config(text="🔔" if active_any else "🔕", fg="white", bg='black')
 
     def open_settings_window(self):
-        # Открытие окна настроек
-        def update_callback(cfg, reopen_settings=False):
-            self.cfg = cfg
-            self.language = self.cfg.get("language", DEFAULT_LANGUAGE)
-            self.l10n = LANGUAGES.get(self.language, LANGUAGES["en"])
-            try:
-                locale.setlocale(locale.LC_TIME, "ru_RU.UTF-8" if self.language == "ru" else "en_US.UTF-8")
-            except locale.Error:
-                locale.setlocale(locale.LC_TIME, "")
-            save_config(self.cfg)
-            self.clock_widgets.load_clocks_from_cfg()
-            self.update_bell_icon()
-            if reopen_settings:
-                SettingsWindow(self.root, self.gear_label, self.cfg, self.l10n, update_callback,
-                               exit_callback=self.exit_program)
-
-        def exit_callback():
-            self.root.destroy()
-            sys.exit(0)
+        # Окно настроек строится при первом открытии, дальше только показывается
+        if self.settings is None or not self.settings.win.winfo_exists():
+            from settings import SettingsWindow
+            self.settings = SettingsWindow(self.root, self.gear_label, self.cfg, self.l10n,
+                                           self.on_settings_changed, exit_callback=self.exit_program)
+        else:
+            self.settings.show(self.cfg, self.l10n)
 
-        SettingsWindow(self.root, self.gear_label, self.cfg, self.l10n, update_callback, exit_callback=exit_callback)
+    def on_settings_changed(self, cfg):
+        # будильники окно настроек не редактирует — оставляем те же объекты, что в расписании
+        cfg["alarms"] = self.alarm_store
+        self.cfg = cfg
+        self.language = self.cfg.get("language", DEFAULT_LANGUAGE)
+        self.l10n = LANGUAGES.get(self.language, LANGUAGES["en"])
+        try:
+            locale.setlocale(locale.LC_TIME, "ru_RU.UTF-8" if self.language == "ru" else "en_US.UTF-8")
+        except locale.Error:
+            locale.setlocale(locale.LC_TIME, "")
+        save_config(self.cfg)
+        self.clock_widgets.fonts.set_family(self.cfg.get("global_font", DEFAULT_FONT))
+        self.clock_widgets.load_clocks_from_cfg()
+        self.schedule_clocks()
+        self.update_bell_icon()
 
     def exit_program(self):
-        # Закрытие программы
+        # Закрытие программы с записью несохранённых изменений (в т.ч. правок в открытом окне будильников)
+        if self.alarms:
+            self.alarms.commit_changes()
+        self.cfg["alarms_checked_at"] = int(time.time())
+        save_config(self.cfg)
+        flush_config()
         self.root.destroy()
         sys.exit(0)
 
-    def check_alarms(self):
-        now = datetime.now()
+    def on_alarms_changed(self, event, alarm, index):
+        # Любое изменение будильников — одна запись в журнал и обновление значка;
+        # расписание и список в окне подписаны на хранилище сами
+        self.update_bell_icon()
+        if event == RESET:
+            self.journal.reset(self.alarm_store)
+        elif event == REMOVED:
+            self.journal.delete(alarm.id)
+        else:
+            self.journal.put(alarm, self.alarm_store.next_fire(alarm))
+        if self.journal.needs_compaction:
+            # снимок пишется в фоновом потоке, после записи журнал усекается
+            save_config(self.cfg)
 
-        # Берём актуальные будильники
-        if self.alarms and hasattr(self.alarms, "alarms"):
-            alarms = self.alarms.alarms
+    def fire_alarm(self, alarm):
+        # показываем уведомление
+        if self.alarms:
+            self.alarms.show_notification(alarm)
+        else:
+            print("Будильник:", alarm.name, "сработал!")
+        # отключаем одноразовый (повтор может быть записан и локализованным названием)
+        if alarm_rule(alarm).kind == ONCE:
+            alarm.active = False
+        self.journal.fired(alarm, alarm.last_fired or time.time())
+        self.alarm_store.changed(alarm)
+        self.save_alarm_state()
+
+    def on_alarms_missed(self, missed):
+        # Одно сводное уведомление о будильниках, пропущенных во время сна или простоя
+        lines = [f"{alarm.name} — {datetime.fromtimestamp(when).strftime('%Y-%m-%d %H:%M')}"
+                 for alarm, when in missed]
+        text = self.l10n.get("missed_alarms", "Пропущенные будильники:") + "\n" + "\n".join(lines)
+        if self.alarms:
+            self.alarms.show_notification(Alarm(name="", active=False, notification=text))
         else:
-            alarms = self.cfg.get("alarms", [])
-
-        for alarm in alarms:
-            if not alarm.get("active", True):
-                continue
-            try:
-                alarm_time = datetime.strptime(f"{alarm['date']} {alarm['time']}", "%Y-%m-%d %H:%M")
-                if 0 <= (now - alarm_time).total_seconds() < 60:  # проверка до 1 минуты
-                    # показываем уведомление
-                    if self.alarms:
-                        self.alarms.show_notification(alarm)
-                    else:
-                        print("Будильник:", alarm.get("name"), "сработал!")
-                    # отключаем одноразовый
-                    if alarm.get("repeat", "once") == "once":
-                        alarm["active"] = False
-                    if self.alarms:
-                        self.alarms.update_alarm_list()
-                    self.update_bell_icon()
-            except Exception as e:
-                print("Ошибка проверки будильника:", e)
-
-        self.root.after(1000, self.check_alarms)
+            print(text)
+        self.mark_missed(missed)
+
+    def mark_missed(self, missed):
+        # Пропущенные срабатывания (из сводки или без уведомления) сохраняются так же, как показанные
+        for alarm, when in missed:
+            if alarm_rule(alarm).kind == ONCE:
+                alarm.active = False
+            self.journal.fired(alarm, when, missed=True)
+        self.alarm_store.changed_many(alarm for alarm, when in missed)
+        self.save_alarm_state()
+
+    def save_alarm_state(self):
+        # Журнал срабатываний хранится в самих будильниках, момент последней проверки — записью журнала
+        if self.alarm_scheduler.checked_until:
+            self.cfg["alarms_checked_at"] = int(self.alarm_scheduler.checked_until)
+            self.journal.checked(self.cfg["alarms_checked_at"])
 
 
 if __name__ == "__main__":
+    # --profile-startup: напечатать время до первой отрисовки часов по этапам и выйти
+    profile = StartupProfile(STARTED) if "--profile-startup" in sys.argv else None
+    if profile:
+        profile.mark("imports")
     root = tk.Tk()
-    app = DigitalClockApp(root)
-    root.mainloop()
\ No newline at end of file
+    if profile:
+        profile.mark("tk")
+    app = DigitalClockApp(root, profile=profile)
+    if profile:
+        print(profile.report())
+        flush_config()
+        root.destroy()
+    else:
+        root.mainloop()
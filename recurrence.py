@@ -0,0 +1,138 @@
+import calendar
+from datetime import datetime, date, time as dtime, timedelta
+from enum import Enum
+from functools import lru_cache
+from config import LANGUAGES
+
+
+class Repeat(str, Enum):
+    """Нормализованный вид повтора; значение совпадает с тем, что пишется в JSON."""
+    ONCE = "once"
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+ONCE = Repeat.ONCE
+DAILY = Repeat.DAILY
+WEEKLY = Repeat.WEEKLY
+MONTHLY = Repeat.MONTHLY
+ALL_DAYS = 0b1111111
+
+# Все известные написания повторов (включая локализованные «Ежемесячно», «Однократно» и т.п.)
+_REPEAT_ALIASES = {kind.value: kind for kind in Repeat}
+for _l10n in LANGUAGES.values():
+    for _kind in Repeat:
+        if _l10n.get(_kind.value):
+            _REPEAT_ALIASES[_l10n[_kind.value].strip().lower()] = _kind
+
+
+def normalize_repeat(value):
+    """Приводит значение repeat (в т.ч. локализованное) к once/daily/weekly/monthly."""
+    if not value:
+        return ONCE
+    return _REPEAT_ALIASES.get(str(value).strip().lower(), ONCE)
+
+
+def days_to_mask(days):
+    """Список из 7 флагов (Пн..Вс) -> битовая маска, бит 0 — понедельник."""
+    mask = 0
+    for i, flag in enumerate((days or [])[:7]):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def mask_to_days(mask):
+    return [bool(mask & (1 << i)) for i in range(7)]
+
+
+class RepeatRule:
+    """Нормализованное правило повтора будильника."""
+    __slots__ = ("kind", "at", "start", "weekdays", "day_of_month")
+
+    def __init__(self, kind, at, start=None, weekdays=0, day_of_month=1):
+        self.kind = kind
+        self.at = at  # время срабатывания (datetime.time)
+        self.start = start  # дата: единственная для once, первая возможная для остальных
+        self.weekdays = weekdays
+        self.day_of_month = day_of_month
+
+    def __repr__(self):
+        return (f"RepeatRule({self.kind!r}, {self.at}, start={self.start}, "
+                f"weekdays={self.weekdays:07b}, day_of_month={self.day_of_month})")
+
+    def next_after(self, after):
+        """Ближайшее срабатывание строго после момента after (наивный datetime) или None."""
+        if self.start is not None:
+            first = datetime.combine(self.start, self.at)
+            if self.kind == ONCE:
+                return first if first > after else None
+            if first > after:
+                # до даты начала ищем от неё самой
+                after = first - timedelta(microseconds=1)
+        elif self.kind == ONCE:
+            return None
+
+        if self.kind == DAILY:
+            candidate = datetime.combine(after.date(), self.at)
+            return candidate if candidate > after else candidate + timedelta(days=1)
+
+        if self.kind == WEEKLY:
+            mask = self.weekdays or (1 << (self.start or after.date()).weekday())
+            day = after.date()
+            offset = 0 if datetime.combine(day, self.at) > after else 1
+            weekday = (day.weekday() + offset) % 7
+            # Поворачиваем маску так, чтобы бит 0 соответствовал первому дню-кандидату
+            rotated = ((mask >> weekday) | (mask << (7 - weekday))) & ALL_DAYS
+            shift = (rotated & -rotated).bit_length() - 1
+            return datetime.combine(day + timedelta(days=offset + shift), self.at)
+
+        if self.kind == MONTHLY:
+            year, month = after.year, after.month
+            candidate = self._month_occurrence(year, month)
+            if candidate <= after:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                candidate = self._month_occurrence(year, month)
+            return candidate
+        return None
+
+    def _month_occurrence(self, year, month):
+        # День месяца ограничивается последним днём (31 -> 30 или 28/29)
+        day = min(self.day_of_month, calendar.monthrange(year, month)[1])
+        return datetime.combine(date(year, month, day), self.at)
+
+    def occurrences(self, after, limit=None):
+        """Ленивый перебор будущих срабатываний после момента after."""
+        count = 0
+        current = self.next_after(after)
+        while current is not None and (limit is None or count < limit):
+            yield current
+            count += 1
+            current = self.next_after(current)
+
+
+@lru_cache(maxsize=4096)
+def make_rule(repeat, hour, minute, start, mask, day_month):
+    """Правило повтора из уже разобранных полей будильника (кэшируется по их значениям)."""
+    kind = repeat
+    # Выбранные в форме дни недели задают повтор сами по себе
+    if mask == ALL_DAYS:
+        kind = DAILY
+    elif mask:
+        kind = WEEKLY
+    # Для ежемесячного повтора день берётся из выбранной в календаре даты, day_month — запасной вариант
+    day_of_month = start.day if start is not None else max(1, min(31, day_month))
+    return RepeatRule(kind, dtime(hour, minute), start, mask, day_of_month)
+
+
+def alarm_rule(alarm):
+    """Правило повтора будильника (Alarm)."""
+    return make_rule(alarm.repeat, alarm.hour, alarm.minute, alarm.date, alarm.weekdays, alarm.day_of_month)
+
+
+def next_occurrence(alarm, after):
+    """Следующее срабатывание будильника после after или None (выключен или без будущих срабатываний)."""
+    if not alarm.active:
+        return None
+    return alarm_rule(alarm).next_after(after)
@@ -1,18 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, colorchooser, messagebox
-import pytz
 import time
 import copy
-from config import LANGUAGES, LANGUAGE_FLAGS, DEFAULT_FONT, DEFAULT_LANGUAGE
+from config import LANGUAGES, LANGUAGE_FLAGS, DEFAULT_FONT, DEFAULT_LANGUAGE, new_clock_id
 from utils import ToolTip
+from timezones import all_zone_names
+from analog_clock import STYLE_DIGITAL, STYLE_ANALOG
+
+# Варианты вида часов в порядке пунктов выпадающего списка
+STYLES = (STYLE_DIGITAL, STYLE_ANALOG)
+
+
+def copy_settings(cfg):
+    # будильники окно настроек не редактирует — их хранилище не копируем
+    return copy.deepcopy({key: value for key, value in cfg.items() if key != "alarms"})
 
 
 class SettingsWindow:
+    """Окно настроек строится один раз: при закрытии прячется, при повторном открытии
+    (show) заполняется текущей конфигурацией на месте."""
+
     def __init__(self, parent, gear_label, cfg, l10n, update_callback, exit_callback=None):
         # Инициализация окна настроек
         self.parent = parent
         self.gear_label = gear_label
-        self.cfg = copy.deepcopy(cfg)
+        self.cfg = copy_settings(cfg)
         self.l10n = l10n
         self.update_callback = update_callback
         self.exit_callback = exit_callback
@@ -30,6 +42,22 @@ class SettingsWindow:
         self.create_widgets()
         self.load_selected()
 
+    def show(self, cfg, l10n):
+        # Повторное открытие: те же виджеты, новые данные
+        self.cfg = copy_settings(cfg)
+        self.clocks = self.cfg.setdefault("clocks", [])
+        index = self.selected_index.get()
+        self.selected_index.set(index if 0 <= index < len(self.clocks) else (0 if self.clocks else -1))
+        self.fill_clock_list()
+        self.load_selected()
+        self.language_var.set(LANGUAGE_FLAGS.get(self.cfg.get("language", "ru"), "🇷🇺 Русский"))
+        if l10n is not self.l10n:
+            self.l10n = l10n
+            self.update_ui_texts()
+        self.win.deiconify()
+        self.win.lift()
+        self.win.grab_set()
+
     def position_window(self):
         # Позиционирование окна настроек
         screen_width = self.parent.winfo_screenwidth()
@@ -140,8 +168,9 @@ class SettingsWindow:
 
         self.cfg["clocks"] = self.clocks
         self.cfg["settings_window"] = self.win.geometry()
+        self.win.grab_release()
+        self.win.withdraw()
         self.update_callback(self.cfg)
-        self.win.destroy()
 
     def exit_program(self):
         # Закрытие программы с подтверждением
@@ -166,8 +195,8 @@ class SettingsWindow:
 
         top_frame = tk.Frame(scrollable_frame, bg='white')
         top_frame.pack(fill="x", padx=8, pady=(8, 0), before=main_frame)
-        self.title_label = tk.Label(top_frame, text=self.l10n.get("settings_title", "Настройки"), bg='white', font=("Arial", 12, "bold"))
-        self.title_label.pack(side="left", expand=True)
+        self.header_label = tk.Label(top_frame, text=self.l10n.get("settings_title", "Настройки"), bg='white', font=("Arial", 12, "bold"))
+        self.header_label.pack(side="left", expand=True)
         self.language_var = tk.StringVar(value=LANGUAGE_FLAGS.get(self.cfg.get("language", "ru"), "🇷🇺 Русский"))
         self.language_menu = ttk.Combobox(top_frame, textvariable=self.language_var, values=list(LANGUAGE_FLAGS.values()), state="readonly")
         self.language_menu.pack(side="right", padx=(0, 5))
@@ -186,6 +215,7 @@ class SettingsWindow:
                 title = f"{base_name} {index}"
                 index += 1
             new_clock = {
+                "id": new_clock_id(),
                 "title": title,
                 "font": "Arial",
                 "font_size": 36,
@@ -233,11 +263,8 @@ class SettingsWindow:
             if new_index != i:
                 self.clocks[i], self.clocks[new_index] = self.clocks[new_index], self.clocks[i]
                 self.cfg["clocks"] = self.clocks
-                self.lb.delete(0, tk.END)
-                for c in self.clocks:
-                    self.lb.insert("end", c.get('title', "Без названия"))
-                self.lb.select_set(new_index)
                 self.selected_index.set(new_index)
+                self.fill_clock_list()
                 self.load_selected()
 
         btn_click_frame = tk.Frame(left, bg='white', bd=2, relief="groove")
@@ -257,11 +284,7 @@ class SettingsWindow:
 
         self.lb = tk.Listbox(left, width=25, height=10, exportselection=False)
         self.lb.pack(fill="both", expand=True, pady=(5, 0))
-        for c in self.clocks:
-            self.lb.insert("end", c.get('title', "Без названия"))
-        if self.clocks:
-            self.lb.select_set(0)
-            self.selected_index.set(0)
+        self.fill_clock_list()
 
         right = tk.Frame(main_frame, bg='white')
         right.pack(side="right", fill="both", expand=True)
@@ -275,9 +298,14 @@ class SettingsWindow:
         self.sel_title = tk.Entry(clock_settings_frame)
         self.sel_title.pack(fill="x", padx=5)
         self.sel_title.bind("<KeyRelease>", lambda e: self.save_changes())
+        self.style_label = tk.Label(clock_settings_frame, text=self.l10n.get("clock_style", "Вид часов:"), bg='white')
+        self.style_label.pack(anchor="w", padx=5, pady=(6, 0))
+        self.sel_style = ttk.Combobox(clock_settings_frame, values=self.style_names(), state="readonly")
+        self.sel_style.pack(fill="x", padx=5)
+        self.sel_style.bind("<<ComboboxSelected>>", lambda e: self.save_changes())
         self.timezone_label = tk.Label(clock_settings_frame, text=self.l10n.get("timezone", "Часовой пояс:"), bg='white')
         self.timezone_label.pack(anchor="w", padx=5, pady=(6, 0))
-        self.sel_timezone = ttk.Combobox(clock_settings_frame, values=sorted(pytz.all_timezones))
+        self.sel_timezone = ttk.Combobox(clock_settings_frame, values=all_zone_names())
         self.sel_timezone.pack(fill="x", padx=5)
         self.sel_timezone.bind("<<ComboboxSelected>>", lambda e: self.save_changes())
         self.date_format_label = tk.Label(clock_settings_frame, text=self.l10n.get("date_format", "Формат даты"), bg='white')
@@ -285,13 +313,13 @@ class SettingsWindow:
         self.sel_date_format = tk.Entry(clock_settings_frame)
         self.sel_date_format.pack(fill="x", padx=5)
         self.sel_date_format.bind("<KeyRelease>", lambda e: self.save_changes())
-        ToolTip(self.sel_date_format, self.l10n.get("tooltip_date_format", "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня"))
+        self.date_format_tip = ToolTip(self.sel_date_format, self.l10n.get("tooltip_date_format", "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня, 'текст' - текст как есть, '' - одиночная кавычка"))
         self.time_format_label = tk.Label(clock_settings_frame, text=self.l10n.get("time_format", "Формат времени"), bg='white')
         self.time_format_label.pack(anchor="w", padx=5, pady=(6, 0))
         self.sel_time_format = tk.Entry(clock_settings_frame)
         self.sel_time_format.pack(fill="x", padx=5)
         self.sel_time_format.bind("<KeyRelease>", lambda e: self.save_changes())
-        ToolTip(self.sel_time_format, self.l10n.get("tooltip_time_format", "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM"))
+        self.time_format_tip = ToolTip(self.sel_time_format, self.l10n.get("tooltip_time_format", "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM, ss.f / ss.ff - десятые / сотые доли секунды, 'текст' - текст как есть, '' - одиночная кавычка"))
         self.font_label = tk.Label(clock_settings_frame, text=self.l10n.get("font", "Шрифт (название):"), bg='white')
         self.font_label.pack(anchor="w", padx=5, pady=(6, 0))
         self.font_entry = tk.Entry(clock_settings_frame)
@@ -327,6 +355,17 @@ class SettingsWindow:
         self.exit_btn.pack(anchor="e")
         self.lb.bind("<<ListboxSelect>>", self.on_listbox_select)
 
+    def style_names(self):
+        return [self.l10n.get("style_digital", "Цифровые"), self.l10n.get("style_analog", "Стрелочные")]
+
+    def fill_clock_list(self):
+        # Список часов с выделением выбранных
+        self.lb.delete(0, tk.END)
+        for c in self.clocks:
+            self.lb.insert("end", c.get('title', "Без названия"))
+        if self.selected_index.get() >= 0:
+            self.lb.select_set(self.selected_index.get())
+
     def on_listbox_select(self, event):
         # Выбор часов из списка
         if self.lb.curselection():
@@ -348,6 +387,7 @@ class SettingsWindow:
         c["color"] = "#FFFFFF"
         c["date_format"] = "dd-MM-yyyy"
         c["time_format"] = "HH:mm:ss"
+        c["style"] = STYLE_DIGITAL
         self.cfg["clocks"] = self.clocks
         self.load_selected()
 
@@ -371,10 +411,14 @@ class SettingsWindow:
     def update_ui_texts(self):
         # Обновление текстов интерфейса на основе выбранного языка
         self.win.title(self.l10n.get("settings_title", "Настройки"))
-        self.title_label.config(text=self.l10n.get("settings_title", "Настройки"))
+        self.header_label.config(text=self.l10n.get("settings_title", "Настройки"))
         self.lbl_sel.config(text=self.l10n.get("selected_clock", "Настройки выбранных часов:"))
         self.title_label.config(text=self.l10n.get("title", "Заголовок:"))
         self.timezone_label.config(text=self.l10n.get("timezone", "Часовой пояс:"))
+        self.style_label.config(text=self.l10n.get("clock_style", "Вид часов:"))
+        style_index = self.sel_style.current()
+        self.sel_style.config(values=self.style_names())
+        self.sel_style.current(max(0, style_index))
         self.date_format_label.config(text=self.l10n.get("date_format", "Формат даты"))
         self.time_format_label.config(text=self.l10n.get("time_format", "Формат времени"))
         self.font_label.config(text=self.l10n.get("font", "Шрифт (название):"))
@@ -385,8 +429,8 @@ class SettingsWindow:
         self.color_btn.config(text="")
         self.reset_btn.config(text=self.l10n.get("reset_default", "Сбросить на умолчанию"))
         self.exit_btn.config(text=self.l10n.get("exit", "Закрыть программу"))
-        ToolTip(self.sel_date_format, self.l10n.get("tooltip_date_format", "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня"))
-        ToolTip(self.sel_time_format, self.l10n.get("tooltip_time_format", "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM"))
+        self.date_format_tip.text = self.l10n.get("tooltip_date_format", "dd - день, MM - месяц, yyyy - год (4 цифры), yy - год (2 цифры), w - короткое название дня, W - полное название дня, 'текст' - текст как есть, '' - одиночная кавычка")
+        self.time_format_tip.text = self.l10n.get("tooltip_time_format", "HH:mm:ss - 24-часовой, hh:mm:ss p - 12-часовой с AM/PM, ss.f / ss.ff - десятые / сотые доли секунды, 'текст' - текст как есть, '' - одиночная кавычка")
 
     def load_selected(self):
         # Загрузка настроек выбранных часов
@@ -394,6 +438,7 @@ class SettingsWindow:
         if i < 0 or i >= len(self.clocks):
             self.sel_title.delete(0, "end")
             self.sel_timezone.set("")
+            self.sel_style.current(0)
             self.font_entry.delete(0, "end")
             self.font_entry.insert(0, "Arial")
             self.sel_size.delete(0, "end")
@@ -412,6 +457,8 @@ class SettingsWindow:
         self.sel_title.delete(0, "end")
         self.sel_title.insert(0, c.get("title", ""))
         self.sel_timezone.set(c.get("timezone", "Europe/Moscow"))
+        style = c.get("style", STYLE_DIGITAL)
+        self.sel_style.current(STYLES.index(style) if style in STYLES else 0)
         self.font_entry.delete(0, "end")
         self.font_entry.insert(0, c.get("font", "Arial"))
         self.sel_size.delete(0, "end")
@@ -444,6 +491,7 @@ class SettingsWindow:
         c["date_format"] = self.sel_date_format.get().strip()
         c["time_format"] = self.sel_time_format.get().strip()
         c["timezone"] = self.sel_timezone.get().strip() or "Europe/Moscow"
+        c["style"] = STYLES[max(0, self.sel_style.current())]
         c["font"] = self.font_entry.get().strip() or "Arial"
         c["font_size"] = self.sel_size.get()
         c["title_font_size"] = self.sel_title_size.get()
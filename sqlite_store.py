@@ -0,0 +1,255 @@
+import json
+import os
+import sqlite3
+import threading
+
+from config import ConfigStore, WriterThread, read_config_file
+from journal import AlarmJournal, JOURNAL_SUFFIX, JOURNAL_SEQ_KEY
+from alarm_model import load_alarms
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alarms (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    next_fire REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alarms_next_fire ON alarms(next_fire) WHERE next_fire IS NOT NULL;
+CREATE INDEX IF NOT EXISTS alarms_name ON alarms(name);
+CREATE INDEX IF NOT EXISTS alarms_position ON alarms(position);
+CREATE TABLE IF NOT EXISTS fired (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alarm_id TEXT NOT NULL,
+    fired_at INTEGER NOT NULL,
+    missed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS fired_alarm ON fired(alarm_id, fired_at);
+"""
+
+# Ключи конфигурации, которые не хранятся в таблице settings
+ALARM_KEYS = ("alarms", JOURNAL_SEQ_KEY)
+
+UPSERT_ALARM = """
+INSERT INTO alarms (id, position, name, active, next_fire, data)
+VALUES (?, COALESCE((SELECT MAX(position) + 1 FROM alarms), 0), ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET name = excluded.name, active = excluded.active,
+    next_fire = excluded.next_fire, data = excluded.data
+"""
+
+UPSERT_SETTING = """
+INSERT INTO settings (key, value) VALUES (?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def migrate_json(conn, json_path):
+    """Однократный перенос clock_config.json (вместе с журналом будильников) в базу.
+    Файлы JSON не удаляются и остаются резервной копией."""
+    loaded = read_config_file(json_path)
+    if not isinstance(loaded, dict):
+        return False
+    items, checked_at = AlarmJournal(json_path + JOURNAL_SUFFIX).replay(
+        loaded.get("alarms", []), since=loaded.get(JOURNAL_SEQ_KEY), checked_at=loaded.get("alarms_checked_at"))
+    alarms = load_alarms(items)
+    with conn:
+        for key, value in loaded.items():
+            if key not in ALARM_KEYS:
+                conn.execute(UPSERT_SETTING, (key, json.dumps(value, ensure_ascii=False)))
+        if checked_at is not None:
+            conn.execute(UPSERT_SETTING, ("alarms_checked_at", json.dumps(checked_at)))
+        conn.executemany(
+            "INSERT OR REPLACE INTO alarms (id, position, name, active, next_fire, data) VALUES (?, ?, ?, ?, NULL, ?)",
+            [(alarm.id, position, alarm.name, int(alarm.active), json.dumps(alarm.to_dict(), ensure_ascii=False))
+             for position, alarm in enumerate(alarms)])
+        conn.execute(UPSERT_SETTING, ("migrated_from", json.dumps(os.path.abspath(json_path))))
+    print("Конфигурация перенесена в SQLite:", json_path, "-> будильников:", len(alarms))
+    return True
+
+
+class SqliteWriter(WriterThread):
+    """Поток записи, которому принадлежит соединение с базой: все запросы выполняются в нём,
+    поток Tk только ставит их в очередь. Соединение открывается (и JSON переносится)
+    при первом запросе."""
+
+    thread_name = "sqlite-writer"
+
+    def __init__(self, path, json_path=None):
+        super().__init__()
+        self.path = path
+        self.json_path = json_path
+        self.conn = None  # используется только потоком записи
+
+    def connection(self):
+        if self.conn is None:
+            fresh = not os.path.exists(self.path)
+            self.conn = connect(self.path)
+            if fresh and self.json_path and os.path.exists(self.json_path):
+                migrate_json(self.conn, self.json_path)
+        return self.conn
+
+    def execute(self, func):
+        # func(conn) в потоке записи, без ожидания
+        self.post(lambda: func(self.connection()))
+
+    def call(self, func):
+        """func(conn) в потоке записи с ожиданием результата — для чтения конфигурации при загрузке."""
+        done = threading.Event()
+        result = {}
+
+        def task():
+            try:
+                result["value"] = func(self.connection())
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        self.post(task)
+        done.wait()
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+
+class SqliteAlarmLog:
+    """Изменения будильников для хранилища SQLite. Повторяет интерфейс AlarmJournal, но сворачивать
+    в снимок нечего. Запросы готовятся в потоке Tk, а выполняются в потоке записи: пачка изменений,
+    накопившаяся до его прохода, — одна транзакция."""
+
+    pending = 0
+    needs_compaction = False
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._buffer = []  # (запрос, параметры, executemany), ещё не переданные в базу
+
+    def replay(self, alarms, since=0, checked_at=None):
+        # будильники уже прочитаны из таблицы при загрузке конфигурации
+        return list(alarms or []), checked_at
+
+    def _queue(self, *ops):
+        with self._lock:
+            self._buffer.extend(ops)
+            scheduled = len(self._buffer) > len(ops)
+        if not scheduled:
+            self.writer.execute(self._write_buffer)
+
+    def _write_buffer(self, conn):
+        with self._lock:
+            ops, self._buffer = self._buffer, []
+        with conn:
+            for sql, params, many in ops:
+                if many:
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+
+    def put(self, alarm, next_fire=None):
+        self._queue((UPSERT_ALARM, (alarm.id, alarm.name, int(alarm.active), next_fire,
+                                    json.dumps(alarm.to_dict(), ensure_ascii=False)), False))
+
+    def delete(self, alarm_id):
+        self._queue(("DELETE FROM alarms WHERE id = ?", (alarm_id,), False))
+
+    def reset(self, alarms):
+        self._queue(
+            ("DELETE FROM alarms", (), False),
+            ("INSERT INTO alarms (id, position, name, active, next_fire, data) VALUES (?, ?, ?, ?, NULL, ?)",
+             [(alarm.id, position, alarm.name, int(alarm.active), json.dumps(alarm.to_dict(), ensure_ascii=False))
+              for position, alarm in enumerate(alarms)], True))
+
+    def checked(self, at):
+        self._queue((UPSERT_SETTING, ("alarms_checked_at", json.dumps(int(at))), False))
+
+    def fired(self, alarm, when, missed=False):
+        self._queue(("INSERT INTO fired (alarm_id, fired_at, missed) VALUES (?, ?, ?)",
+                     (alarm.id, int(when), int(missed)), False))
+
+    def reindex(self, alarms, next_fire):
+        # Индекс по времени срабатывания после загрузки (расписание уже вычислило все моменты)
+        self._queue(("UPDATE alarms SET next_fire = ? WHERE id = ?",
+                     [(next_fire(alarm), alarm.id) for alarm in alarms], True))
+
+    def stamp(self, cfg):
+        return None
+
+    def compacted(self, seq):
+        pass
+
+
+class SqliteConfigStore(ConfigStore):
+    """Хранилище конфигурации в SQLite с тем же интерфейсом, что у ConfigStore.
+
+    Настройки лежат в таблице settings (ключ -> JSON) и пишутся только изменившимися ключами,
+    будильники — строками таблицы alarms, которые меняет SqliteAlarmLog. Все транзакции
+    выполняет поток записи SqliteWriter, владелец соединения."""
+
+    def __init__(self, path, json_path=None, delay_ms=1000):
+        self.json_path = json_path
+        super().__init__(path, delay_ms, use_cache=False)
+        self._saved = {}  # ключ -> JSON значения в базе
+
+    def make_writer(self):
+        return SqliteWriter(self.path, self.json_path)
+
+    def alarm_log(self):
+        return SqliteAlarmLog(self.writer)
+
+    def load(self):
+        return self.writer.call(read_settings)
+
+    def remember(self, cfg):
+        self._saved = {key: json.dumps(value, ensure_ascii=False)
+                       for key, value in cfg.items() if key not in ALARM_KEYS}
+
+    def write(self, cfg):
+        # Транзакция только по изменившимся ключам настроек; будильники пишет SqliteAlarmLog.
+        # Разница считается здесь, транзакция выполняется в потоке записи
+        changed = {}
+        for key, value in cfg.items():
+            if key in ALARM_KEYS:
+                continue
+            text = json.dumps(value, ensure_ascii=False)
+            if self._saved.get(key) != text:
+                changed[key] = text
+        removed = [key for key in self._saved if key not in cfg]
+        if not changed and not removed:
+            self.skipped += 1
+            return False
+        self.writer.execute(lambda conn: write_settings(conn, changed, removed))
+        self._saved.update(changed)
+        for key in removed:
+            del self._saved[key]
+        self.flushed += 1
+        return True
+
+    def stats(self):
+        return {"flushed": self.flushed, "skipped": self.skipped, "coalesced": self.coalesced,
+                "errors": self.writer.errors}
+
+
+def read_settings(conn):
+    cfg = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+    cfg["alarms"] = [json.loads(data) for data, in conn.execute("SELECT data FROM alarms ORDER BY position")]
+    return cfg
+
+
+def write_settings(conn, changed, removed):
+    with conn:
+        conn.executemany(UPSERT_SETTING, changed.items())
+        conn.executemany("DELETE FROM settings WHERE key = ?", [(key,) for key in removed])
@@ -0,0 +1,206 @@
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from time_format import CADENCE_DAY
+from timezones import wall_time, to_timestamp
+
+# Таймер взводится на границу секунды плюс небольшой запас, чтобы не проснуться чуть раньше неё
+SLACK_MS = 5
+# Максимальная задержка таймера: даже при редких обновлениях раз в минуту сверяемся с системными часами
+MAX_SLEEP_MS = 60 * 1000
+# Расхождение (сек) системных и монотонных часов между пробуждениями, после которого
+# считаем, что часы перевели или система спала, и перерисовываем всё
+JUMP_THRESHOLD = 2
+# Ограничение частоты кадров для долей секунды (cfg["max_fps"]), на слабых машинах можно снизить
+DEFAULT_MAX_FPS = 30
+
+
+def next_boundary(cadence, now, tz_name=None):
+    """Ближайший после now момент (секунды epoch), когда может измениться текст с данной частотой.
+    Для дат — следующая полночь по поясу часов, для секунд и минут — граница секунды или минуты."""
+    if cadence is None:
+        return math.inf
+    if cadence == CADENCE_DAY:
+        midnight = datetime.combine(wall_time(now, tz_name).date() + timedelta(days=1), datetime.min.time())
+        return to_timestamp(midnight, tz_name)
+    return (math.floor(now / cadence) + 1) * cadence
+
+
+class TickScheduler:
+    """Общий таймер обновления часов.
+
+    Каждое поле (время или дата часов) регистрируется со своей частотой: секунды, минуты или полночь.
+    Таймер просыпается на ближайшей границе секунды по системным часам, а задержка каждый раз
+    вычисляется заново от текущего времени, поэтому время самого обновления не накапливается.
+    Поле перерисовывается, только когда его текст может измениться."""
+
+    def __init__(self, root=None, clock=time.time, monotonic=time.monotonic, on_tick=None):
+        self.root = root
+        self.clock = clock
+        self.monotonic = monotonic
+        self.on_tick = on_tick  # вызывается перед каждым проходом по полям (например, LabelRenderer.begin_tick)
+        self._tasks = {}  # ключ -> [следующий момент, частота, пояс, функция]
+        self._timer = None
+        self._last_wake = None  # (время, монотонное время) последнего пробуждения
+        self.ticks = 0
+        self.renders = 0
+        self.jumps = 0
+        self.lateness = 0.0  # насколько позже границы было последнее пробуждение (сек)
+
+    def add(self, key, cadence, callback, tz_name=None):
+        # Новое поле рисуется сразу при ближайшем пробуждении
+        self._tasks[key] = [-math.inf, cadence, tz_name, callback]
+
+    def remove(self, key):
+        self._tasks.pop(key, None)
+
+    def clear(self):
+        self._tasks.clear()
+
+    def refresh(self):
+        """Перерисовать все поля сейчас (загрузка или смена настроек часов)."""
+        for task in self._tasks.values():
+            task[0] = -math.inf
+        self.cancel()
+        self._on_timer()
+
+    def next_wake(self):
+        return min((task[0] for task in self._tasks.values()), default=math.inf)
+
+    def run_due(self, now):
+        """Вызывает функции полей, чей момент наступил; возвращает их число."""
+        count = 0
+        for task in list(self._tasks.values()):
+            if task[0] <= now:
+                task[3]()
+                task[0] = next_boundary(task[1], now, task[2])
+                count += 1
+        self.renders += count
+        return count
+
+    def detect_jump(self, now, mono):
+        jump = False
+        if self._last_wake is not None:
+            wall_elapsed = now - self._last_wake[0]
+            mono_elapsed = mono - self._last_wake[1]
+            jump = abs(wall_elapsed - mono_elapsed) > JUMP_THRESHOLD
+        self._last_wake = (now, mono)
+        if jump:
+            self.jumps += 1
+        return jump
+
+    def _on_timer(self):
+        self._timer = None
+        now = self.clock()
+        if self.detect_jump(now, self.monotonic()):
+            # после перевода часов или сна запланированные границы недействительны
+            for task in self._tasks.values():
+                task[0] = -math.inf
+        wake = self.next_wake()
+        if wake != -math.inf and wake <= now:
+            self.lateness = now - wake
+        self.ticks += 1
+        if self.on_tick is not None:
+            self.on_tick()
+        self.run_due(now)
+        self.arm()
+
+    def arm(self):
+        if self.root is None:
+            return
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+        wake = self.next_wake()
+        now = self.clock()
+        if wake == math.inf:
+            delay = MAX_SLEEP_MS
+        else:
+            delay = min(MAX_SLEEP_MS, max(0, math.ceil((wake - now) * 1000)) + SLACK_MS)
+        self._timer = self.root.after(delay, self._on_timer)
+
+    def cancel(self):
+        if self.root is not None and self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = None
+
+    def stats(self):
+        return {"ticks": self.ticks, "renders": self.renders, "jumps": self.jumps,
+                "lateness_ms": round(self.lateness * 1000, 1)}
+
+
+class FrameTicker:
+    """Частый таймер для полей с долями секунды (10–100 кадров в секунду).
+
+    Перерисовывает только зарегистрированные в нём поля, остальное часы обновляют через TickScheduler.
+    Кадры идут по монотонным часам с шагом 1/fps от предыдущего запланированного кадра, поэтому
+    ритм не плывёт от времени отрисовки; если кадр опоздал больше чем на период, пропущенные кадры
+    не догоняются, а считаются в dropped."""
+
+    def __init__(self, root=None, max_fps=DEFAULT_MAX_FPS, monotonic=time.monotonic, on_tick=None):
+        self.root = root
+        self.max_fps = max(1, int(max_fps or DEFAULT_MAX_FPS))
+        self.monotonic = monotonic
+        self.on_tick = on_tick
+        self._tasks = {}  # ключ -> (нужная частота кадров, функция)
+        self._timer = None
+        self._next = None  # монотонное время следующего кадра
+        self._recent = deque()  # моменты кадров за последнюю секунду
+        self.fps = 0
+        self.frames = 0
+        self.dropped = 0
+
+    def add(self, key, fps, callback):
+        self._tasks[key] = (fps, callback)
+
+    def clear(self):
+        self._tasks.clear()
+        self.stop()
+
+    def start(self):
+        # Частота — самая высокая из нужных полям, но не выше max_fps
+        self.stop()
+        if not self._tasks:
+            self.fps = 0
+            return
+        self.fps = min(self.max_fps, max(fps for fps, _ in self._tasks.values()))
+        self._next = None
+        self._on_frame()
+
+    def stop(self):
+        if self.root is not None and self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = None
+
+    @property
+    def period(self):
+        return 1.0 / self.fps
+
+    def _on_frame(self):
+        self._timer = None
+        now = self.monotonic()
+        period = self.period
+        if self._next is None or now - self._next >= period:
+            if self._next is not None:
+                self.dropped += int((now - self._next) // period)
+            self._next = now
+        if self.on_tick is not None:
+            self.on_tick()
+        for fps, callback in self._tasks.values():
+            callback()
+        self.frames += 1
+        recent = self._recent
+        recent.append(now)
+        while recent[0] <= now - 1:
+            recent.popleft()
+        self._next += period
+        if self.root is not None:
+            delay = max(0, round((self._next - self.monotonic()) * 1000))
+            self._timer = self.root.after(delay, self._on_frame)
+
+    def effective_fps(self):
+        # Кадров за последнюю секунду
+        return len(self._recent)
+
+    def stats(self):
+        return {"target_fps": self.fps, "fps": self.effective_fps(), "frames": self.frames, "dropped": self.dropped}
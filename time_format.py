@@ -0,0 +1,185 @@
+from functools import lru_cache
+from config import LANGUAGES
+
+# Токены пользовательского формата. Порядок важен: более длинные токены
+# проверяются раньше коротких, поэтому "mm" никогда не разбирается как два "m".
+TOKENS = ("yyyy", "yy", "HH", "H", "hh", "h", "mm", "m", "ss", "s", "ff", "f", "dd", "MM", "w", "W", "p")
+
+# Как часто может меняться текст формата (секунды); None — формат без полей времени и даты
+CADENCE_SECOND = 1
+CADENCE_MINUTE = 60
+CADENCE_DAY = 24 * 60 * 60  # в полночь по поясу часов
+CADENCE_TENTH = 0.1
+CADENCE_HUNDREDTH = 0.01
+# Доли секунды: f — десятые, ff — сотые. Их выводит отдельный частый путь отрисовки (FrameTicker)
+FRACTION_TOKENS = frozenset(("ff", "f"))
+SECOND_TOKENS = frozenset(("ss", "s"))
+TIME_TOKENS = frozenset(("HH", "H", "hh", "h", "mm", "m", "p"))
+# Сколько цифр выводит токен (остальные токены — названия дней и AM/PM)
+TOKEN_DIGITS = {"yyyy": 4, "yy": 2, "HH": 2, "H": 2, "hh": 2, "h": 2, "mm": 2, "m": 2, "ss": 2, "s": 2, "ff": 2, "f": 1,
+                "dd": 2, "MM": 2}
+
+DEFAULT_DAYS_SHORT = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+DEFAULT_DAYS_FULL = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def tokenize(user_format):
+    """Разбивает формат на список (is_token, text). Текст в одинарных кавычках — литерал;
+    кавычка без пары — сама одиночная кавычка, разбор продолжается за ней."""
+    parts = []
+    literal = []
+    i = 0
+    n = len(user_format)
+    while i < n:
+        ch = user_format[i]
+        if ch == "'":
+            # 'текст' выводится как есть, '' — одиночная кавычка
+            end = user_format.find("'", i + 1)
+            if end == -1:
+                # незакрытая кавычка не поглощает остаток формата ("it's HH:mm")
+                literal.append("'")
+                i += 1
+                continue
+            literal.append(user_format[i + 1:end] if end > i + 1 else "'")
+            i = end + 1
+            continue
+        for token in TOKENS:
+            if user_format.startswith(token, i):
+                if literal:
+                    parts.append((False, "".join(literal)))
+                    literal = []
+                parts.append((True, token))
+                i += len(token)
+                break
+        else:
+            literal.append(ch)
+            i += 1
+    if literal:
+        parts.append((False, "".join(literal)))
+    return parts
+
+
+class CompiledFormat:
+    """Заранее разобранный формат: шаблон str.format и список вычисляемых полей."""
+    __slots__ = ("pattern", "language", "template", "extras", "tokens", "cadence", "digits", "literal", "choices")
+
+    def __init__(self, pattern, language):
+        self.pattern = pattern
+        self.language = language
+        l10n = LANGUAGES.get(language, LANGUAGES["en"])
+        days_short = tuple(l10n.get("days_short", DEFAULT_DAYS_SHORT))
+        days_full = tuple(l10n.get("days_full", DEFAULT_DAYS_FULL))
+
+        parts = tokenize(pattern)
+        self.tokens = frozenset(text for is_token, text in parts if is_token)
+        if "ff" in self.tokens:
+            self.cadence = CADENCE_HUNDREDTH
+        elif "f" in self.tokens:
+            self.cadence = CADENCE_TENTH
+        elif self.tokens & SECOND_TOKENS:
+            self.cadence = CADENCE_SECOND
+        elif self.tokens & TIME_TOKENS:
+            self.cadence = CADENCE_MINUTE
+        elif self.tokens:
+            self.cadence = CADENCE_DAY
+        else:
+            self.cadence = None
+        # Как и раньше: при наличии p и h/hh часы H/HH тоже выводятся в 12-часовом виде
+        twelve_hour = "p" in self.tokens and bool(self.tokens & {"h", "hh"})
+
+        # Поля datetime берутся напрямую через {0.attr}, остальное — через функции-геттеры
+        getters = {
+            "hour12": lambda now: "%02d" % (now.hour % 12 or 12),
+            "am_pm": lambda now: "AM" if now.hour < 12 else "PM",
+            "yy": lambda now: "%02d" % (now.year % 100),
+            # weekday(): 0 — понедельник, а списки дней начинаются с воскресенья
+            "w": lambda now: days_short[(now.weekday() + 1) % 7],
+            "W": lambda now: days_full[(now.weekday() + 1) % 7],
+            "f": lambda now: "%d" % (now.microsecond // 100000),
+            "ff": lambda now: "%02d" % (now.microsecond // 10000),
+        }
+        extras = []
+        slots = {}
+
+        def extra(name):
+            if name not in slots:
+                extras.append(getters[name])
+                slots[name] = len(extras)
+            return "{%d}" % slots[name]
+
+        template = []
+        for is_token, text in parts:
+            if not is_token:
+                template.append(text.replace("{", "{{").replace("}", "}}"))
+            elif text in ("HH", "H"):
+                template.append(extra("hour12") if twelve_hour else "{0.hour:02d}")
+            elif text in ("hh", "h"):
+                template.append(extra("hour12"))
+            elif text in ("mm", "m"):
+                template.append("{0.minute:02d}")
+            elif text in ("ss", "s"):
+                template.append("{0.second:02d}")
+            elif text == "dd":
+                template.append("{0.day:02d}")
+            elif text == "MM":
+                template.append("{0.month:02d}")
+            elif text == "yyyy":
+                template.append("{0.year:04d}")
+            elif text == "yy":
+                template.append(extra("yy"))
+            elif text == "p":
+                template.append(extra("am_pm"))
+            else:
+                template.append(extra(text))
+        self.template = "".join(template)
+        self.extras = tuple(extras)
+
+        # Форма самого широкого вывода: постоянный текст, число цифр и варианты названий
+        self.literal = "".join(text for is_token, text in parts if not is_token)
+        self.digits = sum(TOKEN_DIGITS.get(text, 0) for is_token, text in parts if is_token)
+        variants = {"w": days_short, "W": days_full, "p": ("AM", "PM")}
+        self.choices = tuple(variants[text] for is_token, text in parts if is_token and text in variants)
+
+    def max_width(self, measure, digit_width):
+        """Ширина самого широкого возможного вывода (например, 88:88:88 и самое длинное название дня):
+        measure(text) — ширина текста в шрифте, digit_width — ширина самой широкой цифры."""
+        width = measure(self.literal) if self.literal else 0
+        width += self.digits * digit_width
+        for names in self.choices:
+            width += max(measure(name) for name in names)
+        return width
+
+    def render(self, now):
+        if self.extras:
+            return self.template.format(now, *[get(now) for get in self.extras])
+        return self.template.format(now)
+
+
+def quote_literal(text):
+    # Обратное к tokenize: литерал в кавычках, одиночная кавычка — ''
+    return "''".join("'%s'" % run if run else "" for run in text.split("'"))
+
+
+@lru_cache(maxsize=256)
+def split_fraction(user_format):
+    """Делит формат на часть до первой доли секунды и остаток: "HH:mm:ss.ff" -> ("HH:mm:ss.", "ff").
+    Остаток перерисовывается часто и отдельно; без долей секунды остаток пустой."""
+    parts = tokenize(user_format or "")
+    for index, (is_token, text) in enumerate(parts):
+        if is_token and text in FRACTION_TOKENS:
+            rebuild = lambda chunk: "".join(text if is_token else quote_literal(text) for is_token, text in chunk)
+            return rebuild(parts[:index]), rebuild(parts[index:])
+    return user_format or "", ""
+
+
+@lru_cache(maxsize=256)
+def compile_format(user_format, language):
+    """Возвращает скомпилированный формат из кэша (ключ — строка формата и язык)."""
+    return CompiledFormat(user_format or "", language)
+
+
+def format_datetime(user_format, now, language):
+    """Преобразование пользовательского формата в строку с текущими значениями времени/даты"""
+    if not user_format:
+        return ""
+    return compile_format(user_format, language).render(now)
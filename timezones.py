@@ -0,0 +1,86 @@
+import os
+import time
+from datetime import datetime
+from functools import lru_cache
+import pytz
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """Объект часового пояса pytz по имени (кэшируется); None — системный локальный пояс."""
+    if not name:
+        return None
+    try:
+        return pytz.timezone(name)
+    except pytz.exceptions.UnknownTimeZoneError:
+        print("Неизвестный часовой пояс:", name)
+        return None
+
+
+@lru_cache(maxsize=1)
+def all_zone_names():
+    """Отсортированный список всех поясов pytz для выпадающих списков; строится при первом обращении."""
+    return tuple(sorted(pytz.all_timezones))
+
+
+def is_zone_name(name):
+    """Есть ли пояс name в базе pytz; в отличие от get_zone ничего не печатает."""
+    return bool(name) and name in pytz.all_timezones_set
+
+
+def local_zone_name(default=DEFAULT_TIMEZONE):
+    """Имя системного часового пояса в базе pytz (Europe/Moscow), а не аббревиатура вроде MSK.
+
+    Порядок: переменная TZ, ссылка /etc/localtime (.../zoneinfo/<пояс>), файл /etc/timezone,
+    time.tzname[0] (на Windows это обычно полное название, которого нет в pytz); иначе default."""
+    candidates = [os.environ.get("TZ", "").lstrip(":")]
+    try:
+        link = os.path.realpath("/etc/localtime")
+        if "zoneinfo" + os.sep in link:
+            candidates.append(link.split("zoneinfo" + os.sep, 1)[1])
+    except OSError:
+        pass
+    try:
+        with open("/etc/timezone", encoding="utf-8") as f:
+            candidates.append(f.read().strip())
+    except OSError:
+        pass
+    candidates.append(time.tzname[0])
+    for name in candidates:
+        if is_zone_name(name):
+            return name
+    return default
+
+
+def now_in(name):
+    """Текущее время в поясе name (для неизвестного пояса — локальное наивное время)."""
+    zone = get_zone(name)
+    return datetime.now(zone) if zone else datetime.now()
+
+
+def wall_time(timestamp, name):
+    """Момент (секунды epoch) -> наивное настенное время в поясе name."""
+    zone = get_zone(name)
+    if zone is None:
+        return datetime.fromtimestamp(timestamp)
+    return datetime.fromtimestamp(timestamp, zone).replace(tzinfo=None)
+
+
+def to_timestamp(wall, name):
+    """Наивное настенное время в поясе name -> момент (секунды epoch).
+
+    При переходе на летнее время несуществующее время сдвигается вперёд на величину перехода,
+    а неоднозначное (при переводе часов назад) соответствует первому из двух моментов."""
+    zone = get_zone(name)
+    if zone is None:
+        return wall.timestamp()
+    try:
+        aware = zone.localize(wall, is_dst=None)
+    except pytz.exceptions.AmbiguousTimeError:
+        aware = zone.localize(wall, is_dst=True)
+    except pytz.exceptions.NonExistentTimeError:
+        # Смещение до перевода часов: 02:30 в ночь перехода на летнее время -> 03:30 по новому времени
+        aware = zone.localize(wall, is_dst=False)
+    return aware.timestamp()
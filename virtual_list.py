@@ -0,0 +1,299 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+
+class Column:
+    """Колонка виртуального списка: getter(элемент) возвращает текст или (текст, цвет)."""
+    __slots__ = ("title", "width", "getter")
+
+    def __init__(self, title, width, getter):
+        self.title = title
+        self.width = width
+        self.getter = getter
+
+
+class VirtualList(tk.Frame):
+    """Список на Canvas, в котором элементы создаются только для видимых строк.
+
+    Строки берутся лениво из rows (любая последовательность с len и индексированием) в момент
+    отрисовки, поэтому открытие и прокрутка не зависят от числа строк. Повторяет ту часть API
+    tk.Listbox, которой пользуется окно будильников: curselection, selection_set/clear, activate,
+    see и событие <<ListboxSelect>>."""
+
+    def __init__(self, master, rows, columns, height=10, font=("Arial", 10), bg="white",
+                 select_bg="#0078D7", select_fg="white", **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.rows = rows
+        self.columns = columns
+        self.bg = bg
+        self.select_bg = select_bg
+        self.select_fg = select_fg
+        self.font = tkfont.Font(root=master, font=font)
+        self.row_height = self.font.metrics("linespace") + 4
+        self.char_width = max(1, self.font.measure("n"))
+        width = sum(column.width for column in columns)
+
+        # Заголовки колонок
+        self.header = tk.Canvas(self, width=width, height=self.row_height, bg=bg, highlightthickness=0)
+        self.header.pack(side="top", fill="x")
+        x = 0
+        for column in columns:
+            self.header.create_text(x + 4, self.row_height // 2, anchor="w", text=column.title,
+                                    font=self.font, fill="gray")
+            x += column.width
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = tk.Canvas(self, width=width, height=height * self.row_height, bg=bg,
+                                highlightthickness=0, takefocus=1)
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.top = 0  # индекс первой видимой строки
+        self.selected = set()
+        self.active = 0
+        self.anchor = None
+        self._slots = []  # (прямоугольник, [тексты колонок]) для каждой видимой строки
+        self._drawn = []  # что нарисовано в каждом слоте — неизменившиеся строки не трогаем
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Control-Button-1>", self._on_ctrl_click)
+        self.canvas.bind("<Shift-Button-1>", self._on_shift_click)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", self._on_wheel)
+        self.canvas.bind("<Button-5>", self._on_wheel)
+        self.canvas.bind("<Up>", lambda e: self._move_active(-1))
+        self.canvas.bind("<Down>", lambda e: self._move_active(1))
+        self.canvas.bind("<Prior>", lambda e: self._move_active(-self.visible_count()))
+        self.canvas.bind("<Next>", lambda e: self._move_active(self.visible_count()))
+        self._build_slots()
+        self.redraw()
+
+    def bind(self, sequence=None, func=None, add=None):
+        # События списка (<<ListboxSelect>>, клики) приходят от холста
+        return self.canvas.bind(sequence, func, add)
+
+    def focus_set(self):
+        self.canvas.focus_set()
+
+    # --- размеры и прокрутка ---
+
+    def visible_count(self):
+        height = self.canvas.winfo_height()
+        if height <= 1:  # окно ещё не показано
+            height = int(self.canvas.cget("height"))
+        return max(1, height // self.row_height)
+
+    def _build_slots(self):
+        count = self.visible_count() + 1
+        while len(self._slots) < count:
+            y = len(self._slots) * self.row_height
+            rect = self.canvas.create_rectangle(0, y, 10000, y + self.row_height, width=0, fill=self.bg)
+            texts = []
+            x = 0
+            for column in self.columns:
+                texts.append(self.canvas.create_text(x + 4, y + self.row_height // 2, anchor="w", text="",
+                                                     font=self.font))
+                x += column.width
+            self._slots.append((rect, texts))
+            self._drawn.append(None)
+        while len(self._slots) > count:
+            rect, texts = self._slots.pop()
+            self.canvas.delete(rect, *texts)
+            self._drawn.pop()
+
+    def _on_configure(self, event=None):
+        self._build_slots()
+        self.redraw()
+
+    def _max_top(self):
+        return max(0, len(self.rows) - self.visible_count())
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), self._max_top()))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_count()
+            self.scroll_to(self.top + step)
+
+    def _fractions(self):
+        count = len(self.rows)
+        if not count:
+            return 0.0, 1.0
+        return self.top / count, min(1.0, (self.top + self.visible_count()) / count)
+
+    def see(self, index):
+        visible = self.visible_count()
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + visible:
+            self.scroll_to(index - visible + 1)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.top - 3)
+        else:
+            self.scroll_to(self.top + 3)
+        return "break"
+
+    # --- отрисовка ---
+
+    def redraw(self):
+        self.top = min(self.top, self._max_top())
+        for slot in range(len(self._slots)):
+            self._draw_slot(slot)
+        self.scrollbar.set(*self._fractions())
+
+    def refresh_row(self, index):
+        """Перерисовать строку, если она видна (данные строки изменились)."""
+        slot = index - self.top
+        if 0 <= slot < len(self._slots):
+            self._draw_slot(slot)
+
+    def _draw_slot(self, slot):
+        index = self.top + slot
+        if index < len(self.rows):
+            item = self.rows[index]
+            state = (tuple(self._cell(column, item) for column in self.columns), index in self.selected)
+        else:
+            state = None
+        if self._drawn[slot] == state:
+            return
+        self._drawn[slot] = state
+        rect, texts = self._slots[slot]
+        if state is None:
+            self.canvas.itemconfig(rect, fill=self.bg)
+            for text_id in texts:
+                self.canvas.itemconfig(text_id, text="")
+            return
+        cells, selected = state
+        self.canvas.itemconfig(rect, fill=self.select_bg if selected else self.bg)
+        for text_id, (text, color) in zip(texts, cells):
+            self.canvas.itemconfig(text_id, text=text, fill=self.select_fg if selected else color)
+
+    def _cell(self, column, item):
+        # Значение колонки вычисляется только для видимых строк
+        value = column.getter(item)
+        text, color = value if isinstance(value, tuple) else (value, "black")
+        limit = max(2, column.width // self.char_width - 1)
+        if len(text) > limit:
+            text = text[:limit - 1] + "…"
+        return text, color
+
+    # --- выделение (как у tk.Listbox) ---
+
+    def _index(self, value):
+        if value == tk.END:
+            return len(self.rows) - 1
+        if value == tk.ACTIVE:
+            return self.active
+        return int(value)
+
+    def index(self, value):
+        return self._index(value)
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    def selection_includes(self, index):
+        return self._index(index) in self.selected
+
+    def selection_set(self, first, last=None):
+        first = self._index(first)
+        last = first if last is None else self._index(last)
+        self.selected.update(range(first, min(last, len(self.rows) - 1) + 1))
+        self.anchor = first
+        self.redraw()
+
+    select_set = selection_set
+
+    def selection_clear(self, first, last=None):
+        first = self._index(first)
+        last = first if last is None else self._index(last)
+        if first == 0 and last >= len(self.rows) - 1:
+            self.selected.clear()
+        else:
+            self.selected.difference_update(range(first, last + 1))
+        self.redraw()
+
+    def activate(self, index):
+        self.active = self._index(index)
+
+    def index_at(self, y):
+        return self.top + int(y) // self.row_height
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        index = self.index_at(event.y)
+        if index >= len(self.rows):
+            return
+        self.selected = {index}
+        self.anchor = self.active = index
+        self._selection_changed()
+
+    def _on_ctrl_click(self, event):
+        index = self.index_at(event.y)
+        if index >= len(self.rows):
+            return
+        self.selected ^= {index}
+        self.anchor = self.active = index
+        self._selection_changed()
+
+    def _on_shift_click(self, event):
+        index = self.index_at(event.y)
+        if index >= len(self.rows):
+            return
+        anchor = self.anchor if self.anchor is not None else index
+        self.selected = set(range(min(anchor, index), max(anchor, index) + 1))
+        self.active = index
+        self._selection_changed()
+
+    def _move_active(self, step):
+        if not len(self.rows):
+            return "break"
+        index = max(0, min(len(self.rows) - 1, self.active + step))
+        self.selected = {index}
+        self.anchor = self.active = index
+        self.see(index)
+        self._selection_changed()
+        return "break"
+
+    def _selection_changed(self):
+        self.redraw()
+        self.canvas.event_generate("<<ListboxSelect>>")
+
+    # --- изменение строк (индексы выделения сдвигаются вслед за данными) ---
+
+    def rows_inserted(self, index, count=1):
+        self.selected = {i + count if i >= index else i for i in self.selected}
+        if self.active >= index:
+            self.active += count
+        self.redraw()
+
+    def rows_removed(self, index, count=1):
+        self.selected = {i - count if i >= index + count else i for i in self.selected
+                         if not index <= i < index + count}
+        if self.active >= index + count:
+            self.active -= count
+        self.active = max(0, min(self.active, len(self.rows) - 1))
+        self.redraw()
+
+    def reset(self):
+        """Данные заменены целиком."""
+        self.selected.clear()
+        self.top = 0
+        self.active = 0
+        self.anchor = None
+        self._drawn = [None] * len(self._slots)
+        self.redraw()